@@ -0,0 +1,50 @@
+"""Trigram indexes for person search
+
+Revision ID: 004
+Revises: 003
+Create Date: 2025-01-25 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRGM_INDEXES = [
+    ('idx_person_id_trgm', 'id'),
+    ('idx_person_name_trgm', 'name'),
+]
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # persons is already populated: build without blocking writes. CONCURRENTLY
+    # can't run inside the migration transaction, and a failed build leaves an
+    # INVALID index behind, so a rerun drops any leftover before building
+    with op.get_context().autocommit_block():
+        for name, column in TRGM_INDEXES:
+            op.drop_index(
+                name, table_name='persons', postgresql_concurrently=True, if_exists=True
+            )
+            op.create_index(
+                name,
+                'persons',
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in TRGM_INDEXES:
+            op.drop_index(
+                name, table_name='persons', postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,36 @@
+"""Allocate face embedding IDs from a sequence
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-02-01 00:00:00.000000
+
+New embedding IDs used to come from the vector index size, which falls below
+max(embedding_id) + 1 once deleted faces are left out of a rebuild. The
+sequence starts after the highest stored ID. Run scripts/reindex.py after
+upgrading so the index drops vectors of persons deleted before this revision.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(
+        sa.Sequence('face_embedding_id_seq', start=0, minvalue=0)
+    ))
+    op.execute(
+        "SELECT setval('face_embedding_id_seq', COALESCE(MAX(embedding_id) + 1, 0), false) "
+        "FROM faces"
+    )
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.DropSequence(sa.Sequence('face_embedding_id_seq')))
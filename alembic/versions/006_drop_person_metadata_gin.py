@@ -0,0 +1,35 @@
+"""Drop the unused person metadata GIN index
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-02-05 00:00:00.000000
+
+Earlier releases of 002 built idx_person_metadata_gin, but no query filters
+persons by metadata containment or key, so it only slowed writes.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases migrated with the current 002 never had the index
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'idx_person_metadata_gin',
+            table_name='persons',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    # Nothing queries it; downgrading doesn't bring it back
+    pass
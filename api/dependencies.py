@@ -1,8 +1,14 @@
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from fastapi import Header, HTTPException
+from fastapi import Header, HTTPException, UploadFile
 
 from api.config import settings
+from core.constants import ALLOWED_IMAGE_CONTENT_TYPES
+
+if TYPE_CHECKING:
+    from services.enrollment_service import EnrollmentService
+    from services.identification_service import IdentificationService
+    from services.person_service import PersonService
 
 
 async def get_api_key(api_key: Optional[str] = Header(None, alias="X-API-Key")):
@@ -18,4 +24,40 @@ async def check_admin_role(api_key: str = Header(None, alias="X-API-Key")):
     """Check if user has admin role (placeholder)"""
     # In production, decode JWT and check roles
     # For now, this is a placeholder
-    pass
\ No newline at end of file
+    pass
+
+
+def validate_image_upload(image: UploadFile) -> None:
+    """Reject unsupported or oversized images before reading them into memory"""
+    if image.content_type not in ALLOWED_IMAGE_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid image type: {image.content_type}",
+        )
+    if image.size is not None and image.size > settings.max_upload_bytes:
+        raise HTTPException(status_code=413, detail="Image too large")
+
+
+# Service dependencies. The underlying factories are process-wide singletons;
+# these are async so FastAPI resolves them inline instead of in the threadpool,
+# and tests can swap them via app.dependency_overrides.
+async def get_enrollment_service_dep() -> "EnrollmentService":
+    """Enrollment service dependency"""
+    from services.enrollment_service import get_enrollment_service
+
+    return get_enrollment_service()
+
+
+async def get_identification_service_dep() -> "IdentificationService":
+    """Identification service dependency"""
+    from services.identification_service import get_identification_service
+
+    return get_identification_service()
+
+
+async def get_person_service_dep() -> "PersonService":
+    """Person service dependency"""
+    from services.person_service import get_person_service
+
+    return get_person_service()
+
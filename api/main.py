@@ -1,21 +1,18 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 from api.config import settings
 from api.middleware import (
-    add_correlation_id,
-    add_request_logging,
-    add_response_time,
+    ObservabilityMiddleware,
     rate_limit_middleware,
+    sweep_rate_limit_storage,
 )
 from api.routers import enrollment, health, identification, metrics, persons
-from core.database import engine
 from core.exceptions import FaceRecognitionException
-from core.models import Base
-from indexing import get_index
 from utils.logging import get_logger, setup_logging
 
 # Setup logging
@@ -23,19 +20,47 @@ setup_logging()
 logger = get_logger(__name__)
 
 
+async def apply_migrations() -> bool:
+    """Run Alembic migrations and log the outcome; returns whether they succeeded"""
+    from core.database import run_migrations
+
+    try:
+        logger.info("Running DB migrations...")
+        await run_migrations()
+        logger.info("DB migrations applied successfully")
+        return True
+    except Exception as e:
+        logger.error(f"DB migrations failed: {e}")
+        return False
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
+    from core.database import engine
+    from core.models import Base
+    from indexing import get_index
+
     logger.info("Starting Face Recognition Service")
 
-    # Create database tables
-    try:
-        logger.info("Creating DB tables...")
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        logger.info("DB tables created successfully")
-    except Exception as e:
-        logger.error(f"DB init failed: {e}")
+    # Create database tables (dev only; deployments run `alembic upgrade head`)
+    if settings.auto_create_tables:
+        try:
+            logger.info("Creating DB tables...")
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            logger.info("DB tables created successfully")
+        except Exception as e:
+            logger.error(f"DB init failed: {e}")
+
+    # Apply migrations, optionally in the background so probes are served
+    # immediately; /readiness stays false until the task has succeeded
+    migration_task = None
+    if settings.migration_mode != "off":
+        migration_task = asyncio.create_task(apply_migrations())
+        if settings.migration_mode == "sync":
+            await migration_task
+    app.state.migration_task = migration_task
 
     # Load index
     try:
@@ -45,10 +70,19 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Index load failed: {e}")
 
+    # Evict stale in-process rate limit counters
+    sweeper_task = None
+    if settings.rate_limit_enabled and not settings.rate_limit_redis_url:
+        sweeper_task = asyncio.create_task(sweep_rate_limit_storage())
+
     yield
 
     # Cleanup
     logger.info("Shutting down Face Recognition Service")
+    if sweeper_task is not None:
+        sweeper_task.cancel()
+    if migration_task is not None and not migration_task.done():
+        logger.warning("Shutting down before DB migrations finished")
     await engine.dispose()
 
 
@@ -58,6 +92,7 @@ app = FastAPI(
     description="Enterprise-grade 1:N face recognition API",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -70,9 +105,7 @@ app.add_middleware(
 )
 
 # Add custom middleware
-app.middleware("http")(add_correlation_id)
-app.middleware("http")(add_response_time)
-app.middleware("http")(add_request_logging)
+app.add_middleware(ObservabilityMiddleware)
 
 if settings.rate_limit_enabled:
     app.middleware("http")(rate_limit_middleware)
@@ -88,7 +121,7 @@ app.include_router(persons.router, prefix="/api/v1", tags=["Persons"])
 # Global exception handler
 @app.exception_handler(FaceRecognitionException)
 async def face_recognition_exception_handler(request, exc: FaceRecognitionException):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=400,
         content={
             "error": exc.code,
@@ -101,7 +134,7 @@ async def face_recognition_exception_handler(request, exc: FaceRecognitionExcept
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc: Exception):
     logger.error(f"Unhandled exception", error=str(exc), exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "INTERNAL_SERVER_ERROR",
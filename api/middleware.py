@@ -1,122 +1,194 @@
+import asyncio
+import logging
 import time
 import uuid
-from collections import defaultdict
-from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any
 
 from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from api.config import settings
 from utils.logging import get_logger
 from utils.metrics import REQUEST_COUNT, REQUEST_DURATION
 
 logger = get_logger(__name__)
+_stdlib_logger = logging.getLogger(__name__)
 
-# Rate limiting storage (in production, use Redis)
-rate_limit_storage = defaultdict(list)
+# Fixed-window rate limit counters: client_id -> (window, count).
+# Multi-worker deployments should set RATE_LIMIT_REDIS_URL so limits are shared.
+rate_limit_storage: dict[str, tuple[int, int]] = {}
+_redis_client = None
 
+# Bound metric children keyed by route template, so label() hashing is paid once
+_duration_cache: dict[tuple[str, str], Any] = {}
+_count_cache: dict[tuple[str, str, int], Any] = {}
 
-async def add_correlation_id(request: Request, call_next):
-    """Add correlation ID to requests"""
-    correlation_id = request.headers.get("X-Correlation-ID", str(uuid.uuid4()))
-    request.state.correlation_id = correlation_id
-    
-    response = await call_next(request)
-    response.headers["X-Correlation-ID"] = correlation_id
-    
-    return response
 
+def _request_duration(method: str, endpoint: str) -> Any:
+    """Get cached REQUEST_DURATION child for a route"""
+    key = (method, endpoint)
+    child = _duration_cache.get(key)
+    if child is None:
+        child = _duration_cache[key] = REQUEST_DURATION.labels(method=method, endpoint=endpoint)
+    return child
 
-async def add_response_time(request: Request, call_next):
-    """Add response time header"""
-    start_time = time.time()
-    
-    response = await call_next(request)
-    
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    
-    return response
 
+def _request_count(method: str, endpoint: str, status: int) -> Any:
+    """Get cached REQUEST_COUNT child for a route and status"""
+    key = (method, endpoint, status)
+    child = _count_cache.get(key)
+    if child is None:
+        child = _count_cache[key] = REQUEST_COUNT.labels(
+            method=method, endpoint=endpoint, status=status
+        )
+    return child
+
+
+class ObservabilityMiddleware:
+    """Correlation ID, response time, request logging and metrics in a single ASGI layer"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        correlation_id = Headers(scope=scope).get("x-correlation-id") or uuid.uuid4().hex
+        scope.setdefault("state", {})["correlation_id"] = correlation_id
+        correlation_header = (b"x-correlation-id", correlation_id.encode("latin-1"))
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.raw.append(correlation_header)
+                headers.raw.append(
+                    (b"x-process-time", str(time.perf_counter() - start_time).encode("latin-1"))
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start_time
+            method = scope["method"]
+            path = scope["path"]
+
+            # Skip building the event dict entirely when INFO is filtered out
+            if _stdlib_logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Request completed",
+                    method=method,
+                    path=path,
+                    status_code=status_code,
+                    duration_ms=duration * 1000,
+                    correlation_id=correlation_id,
+                )
+
+            # Label by route template (e.g. /persons/{person_id}) to bound cardinality
+            endpoint = getattr(scope.get("route"), "path", "unmatched")
+            _request_count(method, endpoint, status_code).inc()
+            _request_duration(method, endpoint).observe(duration)
 
-async def add_request_logging(request: Request, call_next):
-    """Log requests and responses"""
-    start_time = time.time()
-    
-    # Log request
-    logger.info(
-        "Request started",
-        method=request.method,
-        path=request.url.path,
-        correlation_id=getattr(request.state, "correlation_id", None),
-    )
-    
-    response = await call_next(request)
-    
-    # Log response
-    duration = time.time() - start_time
-    logger.info(
-        "Request completed",
-        method=request.method,
-        path=request.url.path,
-        status_code=response.status_code,
-        duration_ms=duration * 1000,
-        correlation_id=getattr(request.state, "correlation_id", None),
-    )
-    
-    # Update metrics
-    REQUEST_COUNT.labels(
-        method=request.method,
-        endpoint=request.url.path,
-        status=response.status_code,
-    ).inc()
-    REQUEST_DURATION.labels(
-        method=request.method,
-        endpoint=request.url.path,
-    ).observe(duration)
-    
-    return response
+
+def _get_redis():
+    """Get or create the shared Redis client for rate limiting"""
+    global _redis_client
+    if _redis_client is None:
+        from redis import asyncio as aioredis
+
+        _redis_client = aioredis.from_url(settings.rate_limit_redis_url)
+    return _redis_client
+
+
+def _drop_stale_windows(window: int) -> None:
+    """Remove counters that belong to an earlier window"""
+    stale = [key for key, (start, _) in rate_limit_storage.items() if start != window]
+    for key in stale:
+        rate_limit_storage.pop(key, None)
+
+
+def _evict_clients(window: int) -> None:
+    """Make room in rate_limit_storage when a burst of new clients fills it"""
+    _drop_stale_windows(window)
+
+    # Every tracked client is active: drop the oldest-inserted ones
+    overflow = len(rate_limit_storage) - settings.rate_limit_max_clients + 1
+    for key in list(islice(rate_limit_storage, max(overflow, 0))):
+        del rate_limit_storage[key]
+
+
+def _hit_local(client_id: str) -> int:
+    """Count a request in the in-process fixed window"""
+    window = int(time.monotonic()) // settings.rate_limit_window
+    entry = rate_limit_storage.get(client_id)
+    if entry is None and len(rate_limit_storage) >= settings.rate_limit_max_clients:
+        _evict_clients(window)
+    count = 1 if entry is None or entry[0] != window else entry[1] + 1
+    rate_limit_storage[client_id] = (window, count)
+    return count
+
+
+async def _hit_redis(client_id: str) -> int:
+    """Count a request in the Redis-backed fixed window"""
+    window = int(time.time()) // settings.rate_limit_window
+    key = f"rate_limit:{client_id}:{window}"
+    async with _get_redis().pipeline(transaction=True) as pipe:
+        count, _ = await pipe.incr(key).expire(key, settings.rate_limit_window).execute()
+    return count
 
 
 async def rate_limit_middleware(request: Request, call_next):
-    """Simple rate limiting middleware"""
+    """Fixed-window rate limiting middleware"""
     if not settings.rate_limit_enabled:
         return await call_next(request)
     
     # Get client identifier (IP address or API key)
     client_id = request.client.host if request.client else "unknown"
     
-    # Check rate limit
-    now = datetime.now()
-    window_start = now - timedelta(seconds=settings.rate_limit_window)
-    
-    # Clean old entries
-    rate_limit_storage[client_id] = [
-        timestamp for timestamp in rate_limit_storage[client_id]
-        if timestamp > window_start
-    ]
+    if settings.rate_limit_redis_url:
+        count = await _hit_redis(client_id)
+    else:
+        count = _hit_local(client_id)
     
     # Check if limit exceeded
-    if len(rate_limit_storage[client_id]) >= settings.rate_limit_requests:
+    if count > settings.rate_limit_requests:
         return Response(
             content="Rate limit exceeded",
             status_code=429,
             headers={"Retry-After": str(settings.rate_limit_window)},
         )
     
-    # Add current request
-    rate_limit_storage[client_id].append(now)
-    
     return await call_next(request)
 
 
-class RBACMiddleware(BaseHTTPMiddleware):
+async def sweep_rate_limit_storage() -> None:
+    """Periodically evict counters left over from expired windows"""
+    while True:
+        await asyncio.sleep(settings.rate_limit_window)
+        _drop_stale_windows(int(time.monotonic()) // settings.rate_limit_window)
+
+
+class RBACMiddleware:
     """Role-based access control middleware (placeholder)"""
-    
-    async def dispatch(self, request: Request, call_next):
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not settings.rbac_enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # In production, implement proper RBAC with JWT/OAuth
         # Check roles and permissions here
-        
+
         # For now, just pass through
-        response = await call_next(request)
-        return response
\ No newline at end of file
+        await self.app(scope, receive, send)
@@ -1,9 +1,10 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
 
+from api.dependencies import get_enrollment_service_dep, validate_image_upload
 from core.schemas import EnrollmentResponse
-from services.enrollment_service import get_enrollment_service
+from services.enrollment_service import EnrollmentService
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -16,6 +17,7 @@ async def enroll_faces(
     images: List[UploadFile] = File(...),
     quality_threshold: Optional[float] = Form(None),
     update_if_exists: bool = Form(True),
+    enrollment_service: EnrollmentService = Depends(get_enrollment_service_dep),
 ):
     """
     Enroll face images for a person.
@@ -28,25 +30,14 @@ async def enroll_faces(
     if not images:
         raise HTTPException(status_code=400, detail="At least one image is required")
 
-    # Read image data
-    image_data = []
     for image in images:
-        if image.content_type not in ["image/jpeg", "image/png", "image/jpg"]:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid image type: {image.content_type}",
-            )
-
-        contents = await image.read()
-        image_data.append(contents)
-
-    enrollment_service = get_enrollment_service()
+        validate_image_upload(image)
 
     try:
         # Service already returns EnrollmentResponse object
         return await enrollment_service.enroll_faces(
             person_id=person_id,
-            images=image_data,
+            images=images,
             quality_threshold=quality_threshold,
             update_if_exists=update_if_exists,
         )
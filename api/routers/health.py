@@ -1,6 +1,7 @@
-from datetime import datetime
+import time
+from datetime import UTC, datetime
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from sqlalchemy import text
 
 from api.config import settings
@@ -12,35 +13,75 @@ from utils.logging import get_logger
 logger = get_logger(__name__)
 router = APIRouter()
 
+# Probes hit /health and /readiness every few seconds; share one recent
+# SELECT 1 result between them instead of checking out a connection each time.
+_DB_CHECK_TTL = 2.0
+_last_db_check: tuple[float, bool] = (0.0, False)
+
+# Constant parts of probe responses, built once
+_HEALTH_STATIC = {"version": "1.0.0", "face_engine": settings.face_model}
+_PROBE_HEADERS = {"Cache-Control": "max-age=1"}
+_LIVENESS_BODY = b'{"alive":true}'
+
+
+async def _check_database() -> bool:
+    """Ping the database, reusing a result younger than _DB_CHECK_TTL"""
+    global _last_db_check
+    checked_at, ok = _last_db_check
+    now = time.monotonic()
+    if checked_at and now - checked_at < _DB_CHECK_TTL:
+        return ok
+
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        ok = True
+    except Exception as e:
+        logger.error("Database health check failed", error=str(e))
+        ok = False
+
+    _last_db_check = (now, ok)
+    return ok
+
+
+def _migration_error(request: Request) -> str | None:
+    """Why startup migrations keep the service unready, if they do"""
+    task = getattr(request.app.state, "migration_task", None)
+    if task is None:
+        return None
+    if not task.done():
+        return "database migrations running"
+    if not task.result():
+        return "database migrations failed"
+    return None
+
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(response: Response):
     """Health check endpoint"""
+    response.headers.update(_PROBE_HEADERS)
     health_status = {
+        **_HEALTH_STATIC,
         "status": "healthy",
-        "version": "1.0.0",
-        "timestamp": datetime.utcnow(),
+        "timestamp": datetime.now(UTC),
         "database": "unknown",
         "index_status": "unknown",
-        "face_engine": settings.face_model,
     }
     
     # Check database
-    try:
-        async with engine.connect() as conn:
-            await conn.execute(text("SELECT 1"))
+    if await _check_database():
         health_status["database"] = "connected"
-    except Exception as e:
-        logger.error(f"Database health check failed", error=str(e))
+    else:
         health_status["database"] = "disconnected"
         health_status["status"] = "unhealthy"
+    health_status["database_pool"] = engine.pool.status()
     
     # Check index
     try:
         index = await get_index()
         health_status["index_status"] = f"loaded ({index.size()} embeddings)"
     except Exception as e:
-        logger.error(f"Index health check failed", error=str(e))
+        logger.error("Index health check failed", error=str(e))
         health_status["index_status"] = "error"
         health_status["status"] = "degraded"
     
@@ -48,22 +89,30 @@ async def health_check():
 
 
 @router.get("/readiness")
-async def readiness_check():
+async def readiness_check(request: Request, response: Response):
     """Readiness check for Kubernetes"""
+    response.headers.update(_PROBE_HEADERS)
+    # Probes only look at the status code, so not-ready must be a 503
+    response.status_code = 503
     try:
         # Check if all services are ready
-        async with engine.connect() as conn:
-            await conn.execute(text("SELECT 1"))
+        migration_error = _migration_error(request)
+        if migration_error:
+            return {"ready": False, "error": migration_error}
+        
+        if not await _check_database():
+            return {"ready": False, "error": "database unavailable"}
         
         index = await get_index()
         
+        response.status_code = 200
         return {"ready": True}
     except Exception as e:
-        logger.error(f"Readiness check failed", error=str(e))
+        logger.error("Readiness check failed", error=str(e))
         return {"ready": False, "error": str(e)}
 
 
 @router.get("/liveness")
 async def liveness_check():
     """Liveness check for Kubernetes"""
-    return {"alive": True}
\ No newline at end of file
+    return Response(_LIVENESS_BODY, media_type="application/json", headers=_PROBE_HEADERS)
\ No newline at end of file
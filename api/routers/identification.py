@@ -1,9 +1,11 @@
-from typing import Optional
+from typing import List, Optional
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Response, UploadFile
 
-from core.schemas import IdentificationRequest, IdentificationResponse
-from services.identification_service import get_identification_service
+from api.config import settings
+from api.dependencies import get_identification_service_dep, validate_image_upload
+from core.schemas import BatchIdentificationResponse, IdentificationResponse
+from services.identification_service import IdentificationService
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -16,6 +18,7 @@ async def identify_face(
     similarity_threshold: Optional[float] = Form(None),
     top_k: Optional[int] = Form(None),
     return_face_data: bool = Form(False),
+    identification_service: IdentificationService = Depends(get_identification_service_dep),
 ):
     """
     Identify a person from a face image.
@@ -26,18 +29,12 @@ async def identify_face(
     - **return_face_data**: Include face metadata in response
     """
     # Validate image
-    if image.content_type not in ["image/jpeg", "image/png", "image/jpg"]:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid image type: {image.content_type}",
-        )
+    validate_image_upload(image)
     
     # Read image data
     image_data = await image.read()
     
     # Identify face
-    identification_service = get_identification_service()
-    
     try:
         result = await identification_service.identify_face(
             image_bytes=image_data,
@@ -46,14 +43,65 @@ async def identify_face(
             return_face_data=return_face_data,
         )
         
-        return IdentificationResponse(
-            matches=result["matches"],
-            face_quality=result["face_quality"],
-            processing_time_ms=result["processing_time_ms"],
+        # The liveness result is for in-process callers, not the API response
+        result.pop("liveness", None)
+        
+        # Validate and serialize in pydantic-core, bypassing FastAPI's
+        # dict round-trip through jsonable_encoder
+        return Response(
+            IdentificationResponse.model_validate(result).model_dump_json(),
+            media_type="application/json",
         )
         
     except Exception as e:
-        logger.error(f"Identification failed", error=str(e))
+        logger.error("Identification failed", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/identify_batch", response_model=BatchIdentificationResponse)
+async def identify_faces(
+    images: List[UploadFile] = File(...),
+    similarity_threshold: Optional[float] = Form(None),
+    top_k: Optional[int] = Form(None),
+    return_face_data: bool = Form(False),
+    identification_service: IdentificationService = Depends(get_identification_service_dep),
+):
+    """
+    Identify the face in each of several images in one request.
+    
+    - **images**: Face images to identify, one face per image
+    - **similarity_threshold**: Minimum similarity score (0-1)
+    - **top_k**: Number of top matches to return per image
+    - **return_face_data**: Include face metadata in response
+    """
+    if not images:
+        raise HTTPException(status_code=400, detail="At least one image is required")
+    if len(images) > settings.identify_batch_max_images:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.identify_batch_max_images} images per batch",
+        )
+
+    for image in images:
+        validate_image_upload(image)
+
+    images_data = [await image.read() for image in images]
+
+    try:
+        results = await identification_service.identify_faces(
+            images_bytes=images_data,
+            similarity_threshold=similarity_threshold,
+            top_k=top_k,
+            return_face_data=return_face_data,
+        )
+
+        return Response(
+            BatchIdentificationResponse.model_validate({"results": results}).model_dump_json(),
+            media_type="application/json",
+        )
+
+    except Exception as e:
+        logger.error("Batch identification failed", error=str(e), images=len(images))
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -62,6 +110,7 @@ async def verify_face(
     person_id: str,
     image: UploadFile = File(...),
     similarity_threshold: Optional[float] = Form(None),
+    identification_service: IdentificationService = Depends(get_identification_service_dep),
 ):
     """
     Verify if a face belongs to a specific person (1:1 matching).
@@ -71,18 +120,12 @@ async def verify_face(
     - **similarity_threshold**: Minimum similarity score (0-1)
     """
     # Validate image
-    if image.content_type not in ["image/jpeg", "image/png", "image/jpg"]:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid image type: {image.content_type}",
-        )
+    validate_image_upload(image)
     
     # Read image data
     image_data = await image.read()
     
     # Verify face
-    identification_service = get_identification_service()
-    
     try:
         result = await identification_service.verify_face(
             person_id=person_id,
@@ -93,5 +136,5 @@ async def verify_face(
         return result
         
     except Exception as e:
-        logger.error(f"Verification failed", error=str(e), person_id=person_id)
+        logger.error("Verification failed", error=str(e), person_id=person_id)
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,9 +1,10 @@
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 
+from api.dependencies import get_person_service_dep
 from core.schemas import PersonCreate, PersonResponse, StatsResponse
-from services.person_service import get_person_service
+from services.person_service import PersonService
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -11,10 +12,11 @@ router = APIRouter()
 
 
 @router.get("/persons/{person_id}", response_model=PersonResponse)
-async def get_person(person_id: str):
+async def get_person(
+    person_id: str,
+    person_service: PersonService = Depends(get_person_service_dep),
+):
     """Get person by ID"""
-    person_service = get_person_service()
-
     try:
         return await person_service.get_person(person_id)
     except Exception as e:
@@ -27,10 +29,9 @@ async def list_persons(
     offset: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = Query(None),
+    person_service: PersonService = Depends(get_person_service_dep),
 ):
     """List all persons with pagination"""
-    person_service = get_person_service()
-
     try:
         return await person_service.list_persons(offset, limit, search)
     except Exception as e:
@@ -39,10 +40,11 @@ async def list_persons(
 
 
 @router.post("/persons", response_model=PersonResponse)
-async def create_person(person: PersonCreate):
+async def create_person(
+    person: PersonCreate,
+    person_service: PersonService = Depends(get_person_service_dep),
+):
     """Create a new person"""
-    person_service = get_person_service()
-
     try:
         return await person_service.create_person(
             person_id=person.id,
@@ -55,10 +57,11 @@ async def create_person(person: PersonCreate):
 
 
 @router.delete("/persons/{person_id}")
-async def delete_person(person_id: str):
+async def delete_person(
+    person_id: str,
+    person_service: PersonService = Depends(get_person_service_dep),
+):
     """Delete a person and all associated data"""
-    person_service = get_person_service()
-
     try:
         await person_service.delete_person(person_id)
         return {"message": f"Person {person_id} deleted successfully"}
@@ -68,10 +71,8 @@ async def delete_person(person_id: str):
 
 
 @router.get("/stats", response_model=StatsResponse)
-async def get_stats():
+async def get_stats(person_service: PersonService = Depends(get_person_service_dep)):
     """Get system statistics"""
-    person_service = get_person_service()
-
     try:
         return await person_service.get_stats()
     except Exception as e:
@@ -12,21 +12,62 @@ Usage:
 import asyncio
 import json
 import sys
+from contextlib import ExitStack
 from pathlib import Path
 from typing import List, Optional
 
 import httpx
-from httpx import AsyncClient
+import orjson
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.65
+DEFAULT_TOP_K = 5
 
 
 class FaceRecognitionClient:
     """Client for Face Recognition Service"""
 
-    def __init__(self, base_url: str = "http://localhost:8000", api_key: Optional[str] = None):
+    # Form fields for calls made with default parameters, built and encoded once
+    # (httpx sends bytes values as-is instead of encoding them per request)
+    _IDENTIFY_DEFAULTS = {
+        "similarity_threshold": str(DEFAULT_SIMILARITY_THRESHOLD).encode(),
+        "top_k": str(DEFAULT_TOP_K).encode(),
+        "return_face_data": b"false",
+    }
+    _VERIFY_DEFAULTS = {"similarity_threshold": str(DEFAULT_SIMILARITY_THRESHOLD).encode()}
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        api_key: Optional[str] = None,
+        http2: bool = False,
+    ):
         self.base_url = base_url
         self.headers = {"X-API-Key": api_key} if api_key else {}
         self.timeout = httpx.Timeout(30.0, connect=5.0)
 
+        # Shared client so connections are kept alive across calls. HTTP/2 (needs
+        # httpx[http2]) multiplexes concurrent calls over one connection when the
+        # endpoint, e.g. an ingress in front of uvicorn, supports it.
+        limits = httpx.Limits(
+            max_connections=100, max_keepalive_connections=20, keepalive_expiry=300
+        )
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=self.headers,
+            timeout=self.timeout,
+            transport=httpx.AsyncHTTPTransport(limits=limits, retries=2, http2=http2),
+        )
+
+    async def __aenter__(self) -> "FaceRecognitionClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the underlying connection pool"""
+        await self._client.aclose()
+
     async def enroll(
         self,
         person_id: str,
@@ -34,118 +75,152 @@ class FaceRecognitionClient:
         quality_threshold: float = 0.5,
     ) -> dict:
         """Enroll face images for a person"""
-        async with AsyncClient(timeout=self.timeout) as client:
-            # Prepare files
+        # Open all files concurrently off the event loop
+        handles = await asyncio.gather(
+            *(asyncio.to_thread(open, path, "rb") for path in image_paths),
+            return_exceptions=True,
+        )
+
+        # Pass open handles so httpx streams each file instead of buffering it
+        with ExitStack() as stack:
             files = []
-            for path in image_paths:
-                if not Path(path).exists():
-                    print(f"Warning: File not found: {path}")
+            for path, f in zip(image_paths, handles, strict=True):
+                if isinstance(f, BaseException):
+                    print(f"Warning: Cannot open {path}: {f}")
                     continue
-                
-                with open(path, "rb") as f:
-                    files.append(
-                        ("images", (Path(path).name, f.read(), "image/jpeg"))
-                    )
+
+                stack.enter_context(f)
+                files.append(("images", (Path(path).name, f, "image/jpeg")))
 
             if not files:
                 return {"error": "No valid images found"}
 
             # Make request
-            response = await client.post(
-                f"{self.base_url}/api/v1/enroll/{person_id}",
+            response = await self._client.post(
+                f"/api/v1/enroll/{person_id}",
                 files=files,
                 data={"quality_threshold": str(quality_threshold)},
-                headers=self.headers,
             )
 
-            return response.json()
+        return orjson.loads(response.content)
 
     async def identify(
         self,
         image_path: str,
-        similarity_threshold: float = 0.65,
-        top_k: int = 5,
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        top_k: int = DEFAULT_TOP_K,
     ) -> dict:
         """Identify a person from face image"""
-        async with AsyncClient(timeout=self.timeout) as client:
-            if not Path(image_path).exists():
-                return {"error": f"File not found: {image_path}"}
+        path = Path(image_path)
+        if not path.exists():
+            return {"error": f"File not found: {image_path}"}
 
-            with open(image_path, "rb") as f:
-                files = [("image", (Path(image_path).name, f.read(), "image/jpeg"))]
-
-            response = await client.post(
-                f"{self.base_url}/api/v1/identify",
-                files=files,
-                data={
-                    "similarity_threshold": str(similarity_threshold),
-                    "top_k": str(top_k),
-                    "return_face_data": "false",
-                },
-                headers=self.headers,
+        if similarity_threshold == DEFAULT_SIMILARITY_THRESHOLD and top_k == DEFAULT_TOP_K:
+            data = self._IDENTIFY_DEFAULTS
+        else:
+            data = {
+                "similarity_threshold": str(similarity_threshold),
+                "top_k": str(top_k),
+                "return_face_data": "false",
+            }
+
+        with open(path, "rb") as f:
+            response = await self._client.post(
+                "/api/v1/identify",
+                files=[("image", (path.name, f, "image/jpeg"))],
+                data=data,
             )
 
-            return response.json()
+        return orjson.loads(response.content)
+
+    async def identify_batch(
+        self,
+        image_paths: List[str],
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        top_k: int = DEFAULT_TOP_K,
+    ) -> dict:
+        """Identify the face in each image with a single request
+        Returns: the response, with one result per image in request order,
+        each tagged with its image path
+        """
+        paths = [Path(p) for p in image_paths]
+        missing = [str(p) for p in paths if not p.exists()]
+        if missing:
+            return {"error": f"File not found: {', '.join(missing)}"}
+
+        if similarity_threshold == DEFAULT_SIMILARITY_THRESHOLD and top_k == DEFAULT_TOP_K:
+            data = self._IDENTIFY_DEFAULTS
+        else:
+            data = {
+                "similarity_threshold": str(similarity_threshold),
+                "top_k": str(top_k),
+                "return_face_data": "false",
+            }
+
+        with ExitStack() as stack:
+            files = [
+                ("images", (path.name, stack.enter_context(open(path, "rb")), "image/jpeg"))
+                for path in paths
+            ]
+            response = await self._client.post("/api/v1/identify_batch", files=files, data=data)
+
+        result = orjson.loads(response.content)
+        if "results" not in result:
+            return result
+        # strict: a count mismatch must not silently shift results onto other images
+        result["results"] = [
+            {"image_path": path, **image_result}
+            for path, image_result in zip(image_paths, result["results"], strict=True)
+        ]
+        return result
 
     async def verify(
         self,
         person_id: str,
         image_path: str,
-        similarity_threshold: float = 0.65,
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
     ) -> dict:
         """Verify if face belongs to specific person"""
-        async with AsyncClient(timeout=self.timeout) as client:
-            if not Path(image_path).exists():
-                return {"error": f"File not found: {image_path}"}
+        path = Path(image_path)
+        if not path.exists():
+            return {"error": f"File not found: {image_path}"}
 
-            with open(image_path, "rb") as f:
-                files = [("image", (Path(image_path).name, f.read(), "image/jpeg"))]
+        if similarity_threshold == DEFAULT_SIMILARITY_THRESHOLD:
+            data = self._VERIFY_DEFAULTS
+        else:
+            data = {"similarity_threshold": str(similarity_threshold)}
 
-            response = await client.post(
-                f"{self.base_url}/api/v1/verify/{person_id}",
-                files=files,
-                data={"similarity_threshold": str(similarity_threshold)},
-                headers=self.headers,
+        with open(path, "rb") as f:
+            response = await self._client.post(
+                f"/api/v1/verify/{person_id}",
+                files=[("image", (path.name, f, "image/jpeg"))],
+                data=data,
             )
 
-            return response.json()
+        return orjson.loads(response.content)
 
     async def get_person(self, person_id: str) -> dict:
         """Get person details"""
-        async with AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(
-                f"{self.base_url}/api/v1/persons/{person_id}",
-                headers=self.headers,
-            )
-            return response.json()
+        response = await self._client.get(f"/api/v1/persons/{person_id}")
+        return orjson.loads(response.content)
 
     async def list_persons(self, offset: int = 0, limit: int = 100) -> dict:
         """List all persons"""
-        async with AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(
-                f"{self.base_url}/api/v1/persons",
-                params={"offset": offset, "limit": limit},
-                headers=self.headers,
-            )
-            return response.json()
+        response = await self._client.get(
+            "/api/v1/persons",
+            params={"offset": offset, "limit": limit},
+        )
+        return orjson.loads(response.content)
 
     async def get_stats(self) -> dict:
         """Get system statistics"""
-        async with AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(
-                f"{self.base_url}/api/v1/stats",
-                headers=self.headers,
-            )
-            return response.json()
+        response = await self._client.get("/api/v1/stats")
+        return orjson.loads(response.content)
 
     async def health_check(self) -> dict:
         """Check service health"""
-        async with AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(
-                f"{self.base_url}/health",
-                headers=self.headers,
-            )
-            return response.json()
+        response = await self._client.get("/health")
+        return orjson.loads(response.content)
 
 
 async def main():
@@ -222,6 +297,8 @@ async def main():
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
+    finally:
+        await client.aclose()
 
 
 if __name__ == "__main__":
@@ -23,6 +23,7 @@ DEFAULT_QUALITY_THRESHOLD = 0.5
 # Image processing
 MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB
 ALLOWED_IMAGE_FORMATS = {"JPEG", "JPG", "PNG", "BMP", "WEBP"}
+ALLOWED_IMAGE_CONTENT_TYPES = frozenset({"image/jpeg", "image/png", "image/jpg"})
 IMAGE_PROCESSING_TIMEOUT = 30  # seconds
 
 # Index constants
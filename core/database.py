@@ -1,6 +1,9 @@
+import asyncio
+import sys
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from api.config import settings
@@ -9,8 +12,21 @@ engine = create_async_engine(
     settings.database_url,
     pool_size=settings.db_pool_size,
     max_overflow=settings.db_max_overflow,
-    pool_pre_ping=True,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_recycle=settings.db_pool_recycle,
+    pool_timeout=settings.db_pool_timeout,
     echo=False,
+    # JSONB columns are (de)serialized with orjson instead of the stdlib json module
+    json_serializer=lambda obj: orjson.dumps(obj).decode(),
+    json_deserializer=orjson.loads,
+    # Keep idle connections alive behind NAT / k8s conntrack
+    connect_args={
+        "server_settings": {
+            "tcp_keepalives_idle": "30",
+            "tcp_keepalives_interval": "10",
+            "tcp_keepalives_count": "3",
+        }
+    },
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -44,4 +60,15 @@ async def get_db_context():
             await session.rollback()
             raise
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+
+async def run_migrations() -> None:
+    """Apply Alembic migrations (`alembic upgrade head`) in a subprocess"""
+    # A subprocess keeps alembic's logging fileConfig away from the app's loggers
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "alembic", "upgrade", "head"
+    )
+    returncode = await process.wait()
+    if returncode != 0:
+        raise RuntimeError(f"alembic upgrade failed with exit code {returncode}")
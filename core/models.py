@@ -2,8 +2,8 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import DateTime, Float, Index, String, Text, func, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import DDL, DateTime, Float, Index, LargeBinary, Sequence, String, Text, event, func, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -17,7 +17,8 @@ class Person(Base):
 
     id: Mapped[str] = mapped_column(String(100), primary_key=True)
     name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    meta: Mapped[Optional[dict]] = mapped_column("metadata", Text, nullable=True)  # ✅ fix
+    # Attribute name avoids shadowing DeclarativeBase.metadata; column stays "metadata"
+    person_metadata: Mapped[Optional[dict]] = mapped_column("metadata", JSONB, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
@@ -29,7 +30,34 @@ class Person(Base):
         back_populates="person", cascade="all, delete-orphan"
     )
 
-    __table_args__ = (Index("idx_person_created_at", "created_at"),)
+    __table_args__ = (
+        Index("idx_person_created_at", "created_at"),
+        # Trigram indexes serve the substring ILIKE search in list_persons
+        Index(
+            "idx_person_id_trgm", "id",
+            postgresql_using="gin", postgresql_ops={"id": "gin_trgm_ops"},
+        ),
+        Index(
+            "idx_person_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
+
+
+# create_all needs the trigram operator classes before the indexes above
+event.listen(
+    Person.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+# Source of Face.embedding_id values. IDs are allocated before the faces are
+# inserted (they go into the vector index first) and are never reused, so a
+# rebuilt index that skips deleted faces can't hand a live face's ID out again
+embedding_id_seq = Sequence(
+    "face_embedding_id_seq", start=0, minvalue=0, metadata=Base.metadata
+)
 
 
 class Face(Base):
@@ -44,11 +72,13 @@ class Face(Base):
         nullable=False,
     )
     embedding_id: Mapped[int] = mapped_column(nullable=False)  # FAISS index ID
+    # Raw float16 embedding, so the index can be rebuilt without re-detecting
+    embedding: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
     quality_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     image_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     image_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
-    face_bbox: Mapped[Optional[dict]] = mapped_column(Text, nullable=True)
-    landmarks: Mapped[Optional[dict]] = mapped_column(Text, nullable=True)
+    face_bbox: Mapped[Optional[list]] = mapped_column(JSONB, nullable=True)
+    landmarks: Mapped[Optional[list]] = mapped_column(JSONB, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
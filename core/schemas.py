@@ -2,7 +2,14 @@ import uuid
 from datetime import datetime
 from typing import Any, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+# Response models are built from trusted service data, never mutated, and
+# serialized once; never revalidate them on the way out. Unknown keys are an
+# error so internal service fields cannot leak into responses unnoticed.
+RESPONSE_MODEL_CONFIG = ConfigDict(
+    frozen=True, revalidate_instances="never", validate_assignment=False, extra="forbid"
+)
 
 
 class PersonCreate(BaseModel):
@@ -12,6 +19,8 @@ class PersonCreate(BaseModel):
 
 
 class PersonResponse(BaseModel):
+    model_config = RESPONSE_MODEL_CONFIG
+
     id: str
     name: Optional[str]
     metadata: Optional[dict[str, Any]]
@@ -26,6 +35,8 @@ class EnrollmentRequest(BaseModel):
 
 
 class EnrollmentResponse(BaseModel):
+    model_config = RESPONSE_MODEL_CONFIG
+
     enrollment_id: uuid.UUID
     person_id: str
     faces_enrolled: int
@@ -40,32 +51,56 @@ class IdentificationRequest(BaseModel):
 
 
 class IdentificationMatch(BaseModel):
+    model_config = RESPONSE_MODEL_CONFIG
+
     person_id: str
     similarity: float
     face_id: Optional[uuid.UUID] = None
+    quality_score: Optional[float] = None
     name: Optional[str] = None
     metadata: Optional[dict[str, Any]] = None
 
 
 class IdentificationResponse(BaseModel):
+    model_config = RESPONSE_MODEL_CONFIG
+
     matches: list[IdentificationMatch]
     face_quality: Optional[float] = None
     processing_time_ms: float
 
 
+class BatchIdentificationResult(IdentificationResponse):
+    # Set when this image could not be identified (no face, unreadable, ...)
+    error: Optional[str] = None
+
+
+class BatchIdentificationResponse(BaseModel):
+    model_config = RESPONSE_MODEL_CONFIG
+
+    results: list[BatchIdentificationResult]
+
+
 class HealthResponse(BaseModel):
+    model_config = RESPONSE_MODEL_CONFIG
+
     status: str
     version: str
     timestamp: datetime
     database: str
+    database_pool: Optional[str] = None
     index_status: str
     face_engine: str
 
 
 class StatsResponse(BaseModel):
+    model_config = RESPONSE_MODEL_CONFIG
+
     total_persons: int
     total_faces: int
     total_enrollments: int
     index_size: int
     index_dimension: int
-    similarity_threshold: float
\ No newline at end of file
+    similarity_threshold: float
+    index_type: str
+    face_model: str
+    detector_backend: str
\ No newline at end of file
@@ -1,15 +1,22 @@
+import importlib
 from typing import Optional
 
 from api.config import settings
 from indexing.base import IndexConfig, VectorIndex
-from indexing.faiss_index import FaissIndexFlat
-from indexing.ivfpq_index import FaissIndexIVFPQ
-from indexing.milvus_adapter import MilvusAdapter
-from indexing.scann_adapter import ScannAdapter
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Index backends as "module:Class", imported only when selected
+INDEX_REGISTRY = {
+    "flat": "indexing.faiss_index:FaissIndexFlat",
+    "ivfpq": "indexing.ivfpq_index:FaissIndexIVFPQ",
+    "scann": "indexing.scann_adapter:ScannAdapter",
+    "milvus": "indexing.milvus_adapter:MilvusAdapter",
+    # QdrantAdapter is still a stub whose add() stores nothing; register it
+    # here once it talks to a real collection
+}
+
 # Global index instance
 _vector_index: Optional[VectorIndex] = None
 
@@ -21,28 +28,27 @@ def create_index(config: Optional[IndexConfig] = None) -> VectorIndex:
             dimension=settings.embedding_size,
             metric="cosine",
             index_type=settings.index_type,
+            assume_normalized=settings.index_assume_normalized,
         )
     
     index_type = config.index_type.lower()
     
-    if index_type == "flat":
-        logger.info("Creating FAISS flat index")
-        return FaissIndexFlat(config)
-    elif index_type == "ivfpq":
-        logger.info("Creating FAISS IVF-PQ index")
-        return FaissIndexIVFPQ(config)
-    elif index_type == "scann":
-        logger.info("Creating ScaNN adapter")
-        return ScannAdapter(config)
-    elif index_type == "milvus":
-        logger.info("Creating Milvus adapter")
-        return MilvusAdapter(config)
-    elif index_type == "qdrant":
+    target = INDEX_REGISTRY.get(index_type)
+    if index_type == "qdrant":
         logger.warning("Qdrant adapter not implemented, using FAISS flat")
-        return FaissIndexFlat(config)
-    else:
+        target = INDEX_REGISTRY["flat"]
+    elif target is None:
         logger.warning(f"Unknown index type {index_type}, using FAISS flat")
-        return FaissIndexFlat(config)
+        target = INDEX_REGISTRY["flat"]
+    
+    logger.info("Creating vector index", index_type=index_type, backend=target)
+    return _resolve_backend(target)(config)
+
+
+def _resolve_backend(target: str) -> type[VectorIndex]:
+    """Import a registry entry's module and return its index class"""
+    module_name, _, class_name = target.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
 
 
 async def get_index() -> VectorIndex:
@@ -68,4 +74,4 @@ async def save_index():
         await _vector_index.save(settings.index_path)
 
 
-__all__ = ["VectorIndex", "IndexConfig", "create_index", "get_index", "save_index"]
\ No newline at end of file
+__all__ = ["VectorIndex", "IndexConfig", "INDEX_REGISTRY", "create_index", "get_index", "save_index"]
\ No newline at end of file
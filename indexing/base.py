@@ -1,8 +1,75 @@
+import asyncio
+import os
 from abc import ABC, abstractmethod
-from typing import Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
 
 import numpy as np
 
+# Blocking index calls run on one dedicated thread instead of the shared default
+# executor: FAISS already parallelises each call with OpenMP/BLAS, so fanning
+# out across asyncio's workers only oversubscribes cores, and it also keeps
+# add/search/save on an index from racing each other.
+_index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="faiss")
+
+
+async def run_in_index_thread(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking index call on the dedicated index thread"""
+    return await asyncio.get_running_loop().run_in_executor(_index_executor, func, *args)
+
+
+def drop_page_cache(path: str) -> None:
+    """Flush a freshly written file and evict it from the OS page cache"""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        # Dirty pages are not dropped, so write them back first
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Return L2-normalized float32 rows as a new C-contiguous array
+    Zero rows stay zero; the input array is never modified.
+    """
+    vectors = np.atleast_2d(vectors)
+    # Squared norms via einsum avoid materialising vectors**2
+    norms = np.sqrt(
+        np.einsum("ij,ij->i", vectors, vectors, dtype=np.float32, casting="same_kind")
+    )[:, None]
+    norms[norms == 0] = 1
+    # Cast and scale in one pass, straight into the output buffer
+    return np.divide(vectors, norms, dtype=np.float32, order="C")
+
+
+# Embeddings persisted on Face rows are float16: half the bytes of float32,
+# with negligible cosine error for unit vectors
+EMBEDDING_STORAGE_DTYPE = np.float16
+
+
+def embeddings_to_blobs(embeddings: np.ndarray) -> list[bytes]:
+    """Encode an (n, d) embedding matrix as per-row blobs for Face.embedding"""
+    return [row.tobytes() for row in embeddings.astype(EMBEDDING_STORAGE_DTYPE)]
+
+
+def embeddings_from_blobs(blobs) -> np.ndarray:
+    """Decode Face.embedding blobs into an (n, d) float32 matrix"""
+    stored = np.frombuffer(b"".join(blobs), dtype=EMBEDDING_STORAGE_DTYPE)
+    return stored.reshape(len(blobs), -1).astype(np.float32)
+
+
+def normalize_into(out: np.ndarray, vector: np.ndarray) -> np.ndarray:
+    """L2-normalize one vector into a preallocated (1, d) float32 buffer"""
+    row = out[0]
+    np.copyto(row, vector, casting="same_kind")
+    norm = np.sqrt(row @ row)
+    if norm > 0:
+        row /= norm
+    return out
+
 
 class VectorIndex(ABC):
     """Abstract base class for vector similarity index"""
@@ -21,6 +88,23 @@ class VectorIndex(ABC):
         """
         pass
 
+    async def search_batch(
+        self, query_embeddings: np.ndarray, k: int = 5
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Search for k nearest neighbors of each query row
+        Returns: (distances, indices) of shape (n_queries, k), padded with -1 ids
+        """
+        distances = np.full((len(query_embeddings), k), -np.inf, dtype=np.float32)
+        indices = np.full((len(query_embeddings), k), -1, dtype=np.int64)
+        for row, query in enumerate(query_embeddings):
+            row_distances, row_indices = await self.search(query, k)
+            distances[row, : len(row_distances)] = row_distances
+            indices[row, : len(row_indices)] = row_indices
+        return distances, indices
+
+    async def reserve(self, n: int) -> None:  # noqa: B027 - optional hook, no-op by default
+        """Preallocate storage for n vectors ahead of a bulk add (optional)"""
+
     @abstractmethod
     async def remove(self, ids: list[int]) -> None:
         """Remove embeddings by ID"""
@@ -1,18 +1,48 @@
-import asyncio
+import json
 import os
 import pickle
+import time
 from typing import Any, Optional, Tuple
 
 import faiss
 import numpy as np
 
 from api.config import settings
-from indexing.base import IndexConfig, VectorIndex
+from indexing.base import (
+    IndexConfig,
+    VectorIndex,
+    normalize_into,
+    normalize_rows,
+    run_in_index_thread,
+)
 from utils.logging import get_logger
 from utils.metrics import INDEX_ADD_DURATION, INDEX_SEARCH_DURATION, INDEX_SIZE
 
 logger = get_logger(__name__)
 
+# Bump when the on-disk layout of <path>.ids.npy / <path>.meta.json changes
+INDEX_FORMAT_VERSION = 1
+
+# Rows normalized and added per FAISS call, keeping the working set cache-sized
+ADD_BATCH_ROWS = 65536
+
+# IO_FLAG_MMAP only maps IVF lists; flat codes are still copied to the heap.
+# Newer FAISS builds can map flat codes in place too (IO_FLAG_MMAP_IFC)
+FLAT_MMAP_FLAG = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
+# Reported precision of the scalar-quantized flat storage options
+SCALAR_QUANTIZER_PRECISIONS = {
+    faiss.ScalarQuantizer.QT_fp16: "fp16",
+    faiss.ScalarQuantizer.QT_8bit_uniform: "int8",
+}
+
+# Process-wide FAISS setup, done once when the first FAISS backend is imported
+if settings.index_threads > 0:
+    faiss.omp_set_num_threads(settings.index_threads)
+
+# Shows which SIMD variant faiss' loader picked (generic/AVX2/AVX512)
+logger.info("FAISS build", compile_options=faiss.get_compile_options())
+
 
 class FaissIndexFlat(VectorIndex):
     """FAISS flat index implementation for exact cosine similarity search"""
@@ -21,100 +51,219 @@ class FaissIndexFlat(VectorIndex):
         self.config = config
         self.dimension = config.dimension
         
-        # For cosine similarity with L2-normalized vectors, use IndexFlatIP
-        self.index = faiss.IndexFlatIP(self.dimension)
+        # For cosine similarity with L2-normalized vectors, use inner product
+        self._gpu_resources = None
+        self.index = self._to_device(self._new_cpu_index())
+        self._read_only = False
+        
+        # Embeddings from FaceEngine are already unit length; trusting that skips
+        # a full read/write pass over every added or queried vector
+        self._assume_normalized = config.extra_params.get("assume_normalized", False)
+        self._check_normalized = config.extra_params.get("check_normalized", False)
+        
+        # Reused for single-query searches; only touched on the index thread
+        self._query_buf = np.empty((1, self.dimension), dtype=np.float32)
         
-        # Mapping from FAISS internal IDs to our IDs
-        self.id_map: dict[int, int] = {}
-        self.reverse_id_map: dict[int, int] = {}
+        # Mapping from FAISS internal IDs (array position) to our IDs; removed
+        # entries are tombstoned with -1. Capacity grows geometrically.
+        self._id_array = np.full(1024, -1, dtype=np.int64)
         self._next_internal_id = 0
 
+    def _new_cpu_index(self) -> Any:
+        """Create an empty exhaustive inner-product index at the configured precision"""
+        if settings.index_precision == "fp16" and settings.device != "cuda":
+            # Half-precision codes: half the memory and bandwidth of IndexFlatIP
+            return faiss.IndexScalarQuantizer(
+                self.dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT
+            )
+        if settings.index_precision == "int8" and settings.device != "cuda":
+            # One byte per dimension, a quarter of IndexFlatIP's bandwidth. Unit
+            # vectors have every component in [-1, 1], so the quantizer range is
+            # fixed up front instead of trained (cosine error stays below ~0.005)
+            index = faiss.IndexScalarQuantizer(
+                self.dimension, faiss.ScalarQuantizer.QT_8bit_uniform, faiss.METRIC_INNER_PRODUCT
+            )
+            faiss.copy_array_to_vector(np.array([-1.0, 2.0], dtype=np.float32), index.sq.trained)
+            index.is_trained = True
+            return index
+        # GPU indexes get fp16 storage from the cloner options instead
+        return faiss.IndexFlatIP(self.dimension)
+
+    def _to_device(self, index: Any) -> Any:
+        """Move a CPU index onto the GPU when running with device=cuda"""
+        if settings.device != "cuda":
+            return index
+        if not hasattr(faiss, "StandardGpuResources") or faiss.get_num_gpus() == 0:
+            logger.warning("CUDA requested but FAISS has no GPU support, using CPU index")
+            return index
+
+        if self._gpu_resources is None:
+            self._gpu_resources = faiss.StandardGpuResources()
+        options = faiss.GpuClonerOptions()
+        options.useFloat16 = True  # Half-precision storage halves memory bandwidth
+        return faiss.index_cpu_to_gpu(self._gpu_resources, 0, index, options)
+
+    def _to_cpu(self) -> Any:
+        """Get a CPU copy of the index for serialization"""
+        if self._gpu_resources is None:
+            return self.index
+        return faiss.index_gpu_to_cpu(self.index)
+
+    def _prepare(self, embeddings: np.ndarray) -> np.ndarray:
+        """Get float32 row vectors ready for inner-product search"""
+        if self._assume_normalized:
+            # No copy unless the dtype or layout has to change
+            vectors = np.atleast_2d(np.ascontiguousarray(embeddings, dtype=np.float32))
+            if self._check_normalized:
+                assert np.allclose(np.linalg.norm(vectors, axis=1), 1, atol=1e-3), (
+                    "Embeddings are not L2-normalized"
+                )
+            return vectors
+
+        return normalize_rows(embeddings)
+
+    @property
+    def id_map(self) -> np.ndarray:
+        """External IDs indexed by FAISS internal ID"""
+        return self._id_array[: self._next_internal_id]
+
+    def _grow_ids(self, capacity: int) -> None:
+        """Grow the ID array to hold at least capacity entries"""
+        if capacity > len(self._id_array):
+            grown = np.full(max(capacity, 2 * len(self._id_array)), -1, dtype=np.int64)
+            grown[: self._next_internal_id] = self.id_map
+            self._id_array = grown
+
+    def _append_ids(self, ids: list[int]) -> None:
+        """Append external IDs for newly added vectors"""
+        end = self._next_internal_id + len(ids)
+        self._grow_ids(end)
+        self._id_array[self._next_internal_id : end] = ids
+        self._next_internal_id = end
+
     async def add(self, embeddings: np.ndarray, ids: list[int]) -> None:
         """Add embeddings to index"""
-        start_time = asyncio.get_event_loop().time()
-        
-        # Ensure embeddings are L2-normalized for cosine similarity
-        embeddings = embeddings.astype(np.float32)
-        faiss.normalize_L2(embeddings)
+        if self._read_only:
+            raise RuntimeError("Index was loaded memory-mapped read-only (INDEX_MMAP)")
+
+        start_time = time.perf_counter()
         
-        # Add to index
-        await asyncio.to_thread(self.index.add, embeddings)
+        # Normalize and add in bounded batches; normalization then works on a
+        # cache-resident copy instead of the whole bulk load at once
+        for start in range(0, len(embeddings), ADD_BATCH_ROWS):
+            batch = self._prepare(embeddings[start : start + ADD_BATCH_ROWS])
+            await run_in_index_thread(self.index.add, batch)
         
         # Update ID mappings
-        for i, external_id in enumerate(ids):
-            internal_id = self._next_internal_id + i
-            self.id_map[internal_id] = external_id
-            self.reverse_id_map[external_id] = internal_id
-        
-        self._next_internal_id += len(ids)
+        self._append_ids(ids)
         
         # Update metrics
         INDEX_SIZE.set(self.index.ntotal)
-        duration = asyncio.get_event_loop().time() - start_time
+        duration = time.perf_counter() - start_time
         INDEX_ADD_DURATION.observe(duration)
         
         logger.info(f"Added {len(ids)} embeddings to index", duration_ms=duration * 1000)
 
+    async def reserve(self, n: int) -> None:
+        """Preallocate storage for n vectors before a bulk add"""
+        if self._read_only:
+            return
+        self._grow_ids(n)
+
+        # Flat CPU indexes append to a std::vector of codes on every add; growing
+        # it once and shrinking back keeps the capacity, so later adds never
+        # reallocate and copy the whole index
+        if getattr(self.index, "codes", None) is not None:
+            await run_in_index_thread(self._reserve_codes, n)
+
+    def _reserve_codes(self, n: int) -> None:
+        """Grow the flat code buffer's capacity to n vectors
+        Runs on the index thread, so no add can land between reading ntotal
+        and the two resizes.
+        """
+        index = self.index
+        if n <= index.ntotal:
+            return
+        code_bytes = index.ntotal * index.code_size
+        index.codes.resize(n * index.code_size)
+        index.codes.resize(code_bytes)
+
     async def search(
         self, query_embedding: np.ndarray, k: int = 5
     ) -> Tuple[np.ndarray, np.ndarray]:
         """Search for k nearest neighbors"""
-        start_time = asyncio.get_event_loop().time()
+        distances, external_ids = await self.search_batch(query_embedding.reshape(1, -1), k)
         
-        # Ensure query is L2-normalized
-        query_embedding = query_embedding.astype(np.float32).reshape(1, -1)
-        faiss.normalize_L2(query_embedding)
+        # Filter out invalid IDs (padding and removed entries)
+        valid_mask = external_ids[0] >= 0
+        return distances[0][valid_mask], external_ids[0][valid_mask]
+
+    async def search_batch(
+        self, query_embeddings: np.ndarray, k: int = 5
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Search all query rows in one FAISS call"""
+        start_time = time.perf_counter()
+        query_embeddings = np.atleast_2d(query_embeddings)
         
         # Search
         k = min(k, self.index.ntotal)
-        distances, indices = await asyncio.to_thread(
-            self.index.search, query_embedding, k
-        )
+        if k == 0:
+            return (
+                np.empty((len(query_embeddings), 0), dtype=np.float32),
+                np.empty((len(query_embeddings), 0), dtype=np.int64),
+            )
+        if len(query_embeddings) == 1 and not self._assume_normalized:
+            distances, indices = await run_in_index_thread(
+                self._search_one, query_embeddings[0], k
+            )
+        else:
+            # Ensure queries are L2-normalized
+            queries = self._prepare(query_embeddings)
+            distances, indices = await run_in_index_thread(self.index.search, queries, k)
         
-        # Map internal IDs to external IDs
-        external_ids = np.array([
-            self.id_map.get(int(idx), -1) for idx in indices[0]
-        ])
+        # Map internal IDs to external IDs in one gather; FAISS pads missing
+        # neighbours with -1, which must not wrap around to the last entry
+        external_ids = np.where(indices >= 0, self.id_map[indices], -1)
         
-        # Filter out invalid IDs
-        valid_mask = external_ids >= 0
-        distances = distances[0][valid_mask]
-        external_ids = external_ids[valid_mask]
-        
-        duration = asyncio.get_event_loop().time() - start_time
+        duration = time.perf_counter() - start_time
         INDEX_SEARCH_DURATION.observe(duration)
         
         return distances, external_ids
 
+    def _search_one(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Normalize a single query into the reusable buffer and search it
+        Runs on the index thread, which serializes use of the buffer.
+        """
+        return self.index.search(normalize_into(self._query_buf, query), k)
+
     async def remove(self, ids: list[int]) -> None:
-        """Remove embeddings by ID (not efficiently supported by flat index)"""
-        # Flat index doesn't support efficient removal
-        # Would need to rebuild entire index
-        logger.warning("Remove operation not supported for flat index, consider using IVF")
-        
-        # Update mappings
-        for external_id in ids:
-            if external_id in self.reverse_id_map:
-                internal_id = self.reverse_id_map[external_id]
-                del self.id_map[internal_id]
-                del self.reverse_id_map[external_id]
+        """Remove embeddings by ID
+        Tombstones their ID mappings so search filters them out; the vectors
+        themselves stay in the flat index until it is rebuilt.
+        """
+        if self._read_only:
+            raise RuntimeError("Index was loaded memory-mapped read-only (INDEX_MMAP)")
+
+        # Tombstone mappings so search filters them out
+        id_map = self.id_map
+        id_map[np.isin(id_map, ids)] = -1
 
     async def save(self, path: str) -> None:
         """Save index to disk"""
+        if self._read_only:
+            # Rewriting the file under its own memory map would corrupt it
+            logger.info("Skipping save of memory-mapped read-only index")
+            return
         os.makedirs(os.path.dirname(path), exist_ok=True)
         
         # Save FAISS index
         index_path = f"{path}.index"
-        await asyncio.to_thread(faiss.write_index, self.index, index_path)
+        await run_in_index_thread(lambda: faiss.write_index(self._to_cpu(), index_path))
         
         # Save ID mappings
-        mapping_path = f"{path}.mapping"
-        with open(mapping_path, "wb") as f:
-            pickle.dump({
-                "id_map": self.id_map,
-                "reverse_id_map": self.reverse_id_map,
-                "next_internal_id": self._next_internal_id,
-            }, f)
+        await run_in_index_thread(np.save, f"{path}.ids.npy", self.id_map)
+        with open(f"{path}.meta.json", "w") as f:
+            json.dump({"format_version": INDEX_FORMAT_VERSION, "type": "faiss_flat"}, f)
         
         logger.info(f"Saved index to {path}")
 
@@ -123,25 +272,58 @@ class FaissIndexFlat(VectorIndex):
         # Load FAISS index
         index_path = f"{path}.index"
         if os.path.exists(index_path):
-            self.index = await asyncio.to_thread(faiss.read_index, index_path)
+            # Read-only replicas can map the file instead of copying it to the heap,
+            # letting workers share one copy of the vectors through the page cache
+            io_flags = 0
+            if settings.index_mmap and settings.device != "cuda":
+                io_flags = FLAT_MMAP_FLAG | faiss.IO_FLAG_READ_ONLY
+            index = await run_in_index_thread(faiss.read_index, index_path, io_flags)
+            self.index = self._to_device(index)
+            self._read_only = bool(io_flags)
             
             # Load ID mappings
+            ids_path = f"{path}.ids.npy"
             mapping_path = f"{path}.mapping"
-            if os.path.exists(mapping_path):
+            if os.path.exists(ids_path):
+                self._check_format(path)
+                mmap_mode = "r" if self._read_only else None
+                id_array = await run_in_index_thread(lambda: np.load(ids_path, mmap_mode=mmap_mode))
+                self._load_ids(id_array)
+            elif os.path.exists(mapping_path):
+                # Legacy pickled dict mapping from older releases
                 with open(mapping_path, "rb") as f:
                     data = pickle.load(f)
-                    self.id_map = data["id_map"]
-                    self.reverse_id_map = data["reverse_id_map"]
-                    self._next_internal_id = data["next_internal_id"]
+                id_array = np.full(data["next_internal_id"], -1, dtype=np.int64)
+                for internal_id, external_id in data["id_map"].items():
+                    id_array[internal_id] = external_id
+                self._load_ids(id_array)
             
             INDEX_SIZE.set(self.index.ntotal)
             logger.info(f"Loaded index from {path}", size=self.index.ntotal)
 
+    def _check_format(self, path: str) -> None:
+        """Refuse to load mappings written by a newer on-disk format"""
+        meta_path = f"{path}.meta.json"
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path) as f:
+            version = json.load(f).get("format_version", 0)
+        if version > INDEX_FORMAT_VERSION:
+            raise RuntimeError(f"Unsupported index format version {version} at {path}")
+
+    def _load_ids(self, id_array: np.ndarray) -> None:
+        """Replace the ID mapping with a loaded array"""
+        if self._read_only:
+            # Keep the memory map; mapped indexes never append or tombstone
+            self._id_array = id_array
+        else:
+            self._id_array = np.array(id_array, dtype=np.int64)
+        self._next_internal_id = len(self._id_array)
+
     async def clear(self) -> None:
         """Clear all embeddings from index"""
         self.index.reset()
-        self.id_map.clear()
-        self.reverse_id_map.clear()
+        self._id_array = np.full(1024, -1, dtype=np.int64)
         self._next_internal_id = 0
         INDEX_SIZE.set(0)
 
@@ -159,12 +341,22 @@ class FaissIndexFlat(VectorIndex):
 
     def get_stats(self) -> dict[str, Any]:
         """Get index statistics"""
+        if self._gpu_resources is not None:
+            precision = "fp16"
+        elif isinstance(self.index, faiss.IndexScalarQuantizer):
+            # Read from the index itself, which may have been loaded from disk
+            precision = SCALAR_QUANTIZER_PRECISIONS.get(self.index.sq.qtype, "sq")
+        else:
+            precision = "fp32"
         return {
             "type": "faiss_flat",
+            "device": "cuda" if self._gpu_resources is not None else "cpu",
+            "precision": precision,
             "size": self.index.ntotal,
             "dimension": self.dimension,
             "metric": "cosine",
-            "supports_removal": False,
+            # remove() tombstones ID mappings; the vectors stay until a rebuild
+            "supports_removal": True,
         }
 
 
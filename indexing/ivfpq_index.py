@@ -1,18 +1,42 @@
 import asyncio
 import os
 import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Optional, Tuple
 
 import faiss
 import numpy as np
+import orjson
 
 from api.config import settings
-from indexing.base import IndexConfig, VectorIndex
+from indexing.base import (
+    IndexConfig,
+    VectorIndex,
+    drop_page_cache,
+    normalize_into,
+    normalize_rows,
+    run_in_index_thread,
+)
+from indexing.faiss_index import INDEX_FORMAT_VERSION
 from utils.logging import get_logger
 from utils.metrics import INDEX_ADD_DURATION, INDEX_SEARCH_DURATION, INDEX_SIZE
 
 logger = get_logger(__name__)
 
+# Block size FastScan packs codes into (vectors per SIMD block)
+FAST_SCAN_BBS = 32
+
+# Scalar quantizer code types for the non-PQ storage options
+SCALAR_QUANTIZER_TYPES = {
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+}
+
+# Training gets its own thread so a long k-means run doesn't hold up searches
+# and adds on other indexes queued behind it on the index thread
+_train_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="faiss-train")
+
 
 class FaissIndexIVFPQ(VectorIndex):
     """FAISS IVF-PQ index for large-scale approximate search"""
@@ -23,177 +47,383 @@ class FaissIndexIVFPQ(VectorIndex):
         self.nlist = config.extra_params.get("nlist", settings.ivf_nlist)
         self.m = config.extra_params.get("m", settings.pq_m)
         self.nbits = config.extra_params.get("nbits", settings.pq_nbits)
+        self.quantization = config.extra_params.get("quantization", settings.ivf_quantization)
         
-        # Create IVF-PQ index
+        # Create IVF-PQ index; 4-bit codes use the SIMD FastScan layout, which
+        # scans packed codes with in-register lookup tables
         quantizer = faiss.IndexFlatIP(self.dimension)
-        self.index = faiss.IndexIVFPQ(
-            quantizer, self.dimension, self.nlist, self.m, self.nbits
+        self.fast_scan = self.quantization == "pq" and self.nbits == 4
+        if self.quantization in SCALAR_QUANTIZER_TYPES:
+            # sq8: one int8 code per dimension, 4x smaller than fp32 and scored
+            # by SIMD int8 kernels without PQ lookup tables. fp16: half-size,
+            # near-lossless codes for when int8/PQ recall isn't acceptable
+            self.index = faiss.IndexIVFScalarQuantizer(
+                quantizer, self.dimension, self.nlist,
+                SCALAR_QUANTIZER_TYPES[self.quantization], faiss.METRIC_INNER_PRODUCT,
+            )
+        elif self.fast_scan:
+            self.index = faiss.IndexIVFPQFastScan(
+                quantizer, self.dimension, self.nlist, self.m, 4,
+                faiss.METRIC_INNER_PRODUCT, FAST_SCAN_BBS,
+            )
+        else:
+            self.index = faiss.IndexIVFPQ(
+                quantizer, self.dimension, self.nlist, self.m, self.nbits,
+                faiss.METRIC_INNER_PRODUCT,
+            )
+        
+        # Two-stage search: fetch k * multiplier candidates from the compressed
+        # codes, then rerank them exactly against a float32 copy of the vectors
+        self.rescore_multiplier = config.extra_params.get(
+            "rescore_multiplier", settings.ivf_rescore_multiplier
         )
+        if self.rescore_multiplier > 1:
+            refine = faiss.IndexRefineFlat(self.index)
+            refine.k_factor = self.rescore_multiplier
+            # IndexRefine has no add_with_ids, so IndexIDMap2 translates IDs
+            self.index = faiss.IndexIDMap2(refine)
+        
+        # Cells probed per query: a configured value, or ~2*sqrt(nlist), which
+        # scales with the index instead of a fixed share of lists
+        self.nprobe = config.extra_params.get("nprobe", settings.ivf_nprobe) or int(
+            max(1, min(self.nlist, 2 * self.nlist ** 0.5))
+        )
+        self._apply_search_params()
+        
+        self._read_only = False
         
-        # ID mapping
-        self.id_map: dict[int, int] = {}
-        self.reverse_id_map: dict[int, int] = {}
-        self._next_internal_id = 0
+        # Reused for every query; only touched on the index thread
+        self._query_buf = np.empty((1, self.dimension), dtype=np.float32)
+        
+        # IVF lists store our external IDs directly (add_with_ids), so search
+        # returns them without any Python-side mapping
         self._is_trained = False
         
-        # Training data buffer
-        self._training_data: list[np.ndarray] = []
+        # Training data buffer of the original float32 vectors, filled in
+        # place; allocated on first use, released after training. Kept at full
+        # precision because these vectors are added to the index afterwards
+        self._training_vectors: Optional[np.ndarray] = None
+        self._training_fill = 0
+        self._training_ids: list[int] = []
         self._min_training_samples = max(self.nlist * 40, 10000)
+        
+        # Background training and the adds that arrive while it runs
+        self._train_task: Optional[asyncio.Task] = None
+        self._pending_add: list[tuple[np.ndarray, list[int]]] = []
+
+    def _apply_search_params(self) -> None:
+        """Set search-time parameters on the IVF index once, not per query"""
+        faiss.extract_index_ivf(self.index).nprobe = self.nprobe
+
+    async def _add_with_ids(self, embeddings: np.ndarray, ids: list[int]) -> None:
+        """Add normalized embeddings under their external IDs"""
+        await run_in_index_thread(
+            self.index.add_with_ids, embeddings, np.asarray(ids, dtype=np.int64)
+        )
+
+    def _buffer_training(self, embeddings: np.ndarray, ids: list[int]) -> None:
+        """Copy vectors into the preallocated training buffer"""
+        start = self._training_fill
+        end = start + len(embeddings)
+        capacity = 0 if self._training_vectors is None else len(self._training_vectors)
+        if end > capacity:
+            size = max(end, self._min_training_samples, 2 * capacity)
+            vectors = np.empty((size, self.dimension), dtype=np.float32)
+            if start:
+                vectors[:start] = self._training_vectors[:start]
+            self._training_vectors = vectors
+        
+        self._training_vectors[start:end] = embeddings
+        self._training_ids.extend(ids)
+        self._training_fill = end
+
+    def _release_training(self) -> None:
+        """Drop the training buffer"""
+        self._training_vectors = None
+        self._training_fill = 0
+        # Rebind rather than clear: a buffer search may still hold the old list
+        self._training_ids = []
+
+    def _drop_buffered(self, ids: np.ndarray) -> int:
+        """Remove IDs from the training buffer
+        Builds new arrays rather than compacting in place, since a buffer
+        search on the index thread may still be reading the old ones.
+        """
+        fill = self._training_fill
+        keep = ~np.isin(np.asarray(self._training_ids, dtype=np.int64), ids)
+        if keep.all():
+            return 0
+        self._training_vectors = self._training_vectors[:fill][keep]
+        self._training_ids = [i for i, k in zip(self._training_ids, keep, strict=True) if k]
+        self._training_fill = len(self._training_ids)
+        return fill - self._training_fill
 
     async def add(self, embeddings: np.ndarray, ids: list[int]) -> None:
         """Add embeddings to index"""
-        start_time = asyncio.get_event_loop().time()
+        if self._read_only:
+            raise RuntimeError("Index was loaded memory-mapped read-only (INDEX_MMAP)")
+
+        start_time = time.perf_counter()
         
         # Ensure embeddings are L2-normalized
-        embeddings = embeddings.astype(np.float32)
-        faiss.normalize_L2(embeddings)
+        embeddings = normalize_rows(embeddings)
         
         # Train index if not trained
-        if not self._is_trained:
-            self._training_data.append(embeddings)
-            total_samples = sum(d.shape[0] for d in self._training_data)
-            
-            if total_samples >= self._min_training_samples:
-                await self._train_index()
-        
-        # Add to index only if trained
-        if self._is_trained:
-            await asyncio.to_thread(self.index.add, embeddings)
-            
-            # Update ID mappings
-            for i, external_id in enumerate(ids):
-                internal_id = self._next_internal_id + i
-                self.id_map[internal_id] = external_id
-                self.reverse_id_map[external_id] = internal_id
-            
-            self._next_internal_id += len(ids)
+        if self._train_task is not None:
+            # Training in progress; added once it finishes
+            self._pending_add.append((embeddings, ids))
+        elif not self._is_trained:
+            self._buffer_training(embeddings, ids)
             
+            if self._training_fill >= self._min_training_samples:
+                # Train in the background instead of blocking this request;
+                # training adds the whole buffer, this batch included
+                self._train_task = asyncio.create_task(self._train_index())
+        else:
+            await self._add_with_ids(embeddings, ids)
             INDEX_SIZE.set(self.index.ntotal)
         
-        duration = asyncio.get_event_loop().time() - start_time
+        duration = time.perf_counter() - start_time
         INDEX_ADD_DURATION.observe(duration)
 
     async def _train_index(self):
-        """Train the IVF-PQ index"""
+        """Train the IVF-PQ index, then add everything buffered meanwhile"""
         logger.info("Training IVF-PQ index")
         
-        # Concatenate training data
-        training_data = np.vstack(self._training_data)
-        
-        # Train index
-        await asyncio.to_thread(self.index.train, training_data)
-        self._is_trained = True
-        
-        # Add training data to index
-        await asyncio.to_thread(self.index.add, training_data)
-        
-        # Update ID mappings for training data
-        for i in range(training_data.shape[0]):
-            self.id_map[i] = i
-            self.reverse_id_map[i] = i
-        
-        self._next_internal_id = training_data.shape[0]
-        
-        # Clear training buffer
-        self._training_data.clear()
-        
-        logger.info("IVF-PQ index trained", samples=training_data.shape[0])
+        # Rounds already moved from _pending_add into the index
+        drained: list[tuple[np.ndarray, list[int]]] = []
+        try:
+            training_data = self._training_vectors[: self._training_fill]
+            
+            # Train index
+            await asyncio.get_running_loop().run_in_executor(
+                _train_executor, self.index.train, training_data
+            )
+            
+            # Add training data to index; from here searches use the index,
+            # which holds everything the buffer does
+            await self._add_with_ids(training_data, self._training_ids)
+            self._is_trained = True
+            
+            # Drain adds that arrived during training; anything appended while
+            # this loop awaits is picked up before the index goes live. Each
+            # round goes in as one add so FastScan packs its 32-vector code
+            # blocks once per list rather than once per queued request. A
+            # round stays queued (and counted by size()) until it is added.
+            while self._pending_add:
+                pending = list(self._pending_add)
+                await self._add_with_ids(
+                    np.concatenate([embeddings for embeddings, _ in pending]),
+                    [i for _, ids in pending for i in ids],
+                )
+                drained.extend(pending)
+                del self._pending_add[: len(pending)]
+            
+            # Kept until now so a failure above can fall back to it
+            self._release_training()
+            INDEX_SIZE.set(self.index.ntotal)
+            logger.info("IVF-PQ index trained", samples=training_data.shape[0])
+        except Exception as e:
+            logger.error("IVF-PQ training failed", error=str(e))
+            # Back to the untrained state: empty index, every vector in the
+            # buffer (searched exactly) for the next training attempt
+            self.index.reset()
+            self._is_trained = False
+            for embeddings, ids in drained + self._pending_add:
+                self._buffer_training(embeddings, ids)
+            self._pending_add.clear()
+            INDEX_SIZE.set(0)
+        finally:
+            self._train_task = None
+
+    async def wait_for_training(self) -> None:
+        """Wait for a background training run, if any, to finish"""
+        if self._train_task is not None:
+            await asyncio.shield(self._train_task)
 
     async def search(
         self, query_embedding: np.ndarray, k: int = 5
     ) -> Tuple[np.ndarray, np.ndarray]:
         """Search for k nearest neighbors"""
-        if not self._is_trained:
+        if not self._is_trained and not self._training_fill:
             return np.array([]), np.array([])
         
-        start_time = asyncio.get_event_loop().time()
-        
-        # Ensure query is L2-normalized
-        query_embedding = query_embedding.astype(np.float32).reshape(1, -1)
-        faiss.normalize_L2(query_embedding)
+        start_time = time.perf_counter()
         
-        # Set search parameters
-        self.index.nprobe = min(self.nlist // 4, 16)  # Search 25% of cells
-        
-        # Search
-        k = min(k, self.index.ntotal)
-        distances, indices = await asyncio.to_thread(
-            self.index.search, query_embedding, k
-        )
-        
-        # Map internal IDs to external IDs
-        external_ids = np.array([
-            self.id_map.get(int(idx), -1) for idx in indices[0]
-        ])
-        
-        # Filter out invalid IDs
-        valid_mask = external_ids >= 0
-        distances = distances[0][valid_mask]
-        external_ids = external_ids[valid_mask]
+        if not self._is_trained:
+            # Small corpus still buffered for training: search it exactly
+            distances, external_ids = await run_in_index_thread(
+                self._search_buffer, query_embedding.reshape(-1), k
+            )
+        else:
+            # Search; the query is L2-normalized into the reusable buffer
+            k = min(k, self.index.ntotal)
+            distances, indices = await run_in_index_thread(
+                self._search_one, query_embedding.reshape(-1), k
+            )
+            external_ids = indices[0]
+            
+            # Filter out padding for lists with fewer than k entries
+            valid_mask = external_ids >= 0
+            distances = distances[0][valid_mask]
+            external_ids = external_ids[valid_mask]
         
-        duration = asyncio.get_event_loop().time() - start_time
+        duration = time.perf_counter() - start_time
         INDEX_SEARCH_DURATION.observe(duration)
         
         return distances, external_ids
 
+    def _search_one(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Normalize a single query into the reusable buffer and search it
+        Runs on the index thread, which serializes use of the buffer.
+        """
+        return self.index.search(normalize_into(self._query_buf, query), k)
+
+    def _search_buffer(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact search over the training buffer
+        Runs on the index thread; buffer references are taken up front since
+        the event loop may grow or release the buffer meanwhile.
+        """
+        vectors = self._training_vectors
+        ids, fill = self._training_ids, self._training_fill
+        if vectors is None or not fill:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        
+        query = normalize_into(self._query_buf, query)[0]
+        scores = vectors[:fill] @ query
+        
+        k = min(k, fill)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return scores[top], np.array([ids[i] for i in top], dtype=np.int64)
+
     async def save(self, path: str) -> None:
         """Save index to disk"""
+        await self.wait_for_training()
+        if self._read_only:
+            # Rewriting the file under its own memory map would corrupt it
+            logger.info("Skipping save of memory-mapped read-only index")
+            return
         os.makedirs(os.path.dirname(path), exist_ok=True)
         
         # Save FAISS index
         index_path = f"{path}.ivfpq"
-        await asyncio.to_thread(faiss.write_index, self.index, index_path)
-        
-        # Save metadata
-        metadata_path = f"{path}.metadata"
-        with open(metadata_path, "wb") as f:
-            pickle.dump({
-                "id_map": self.id_map,
-                "reverse_id_map": self.reverse_id_map,
-                "next_internal_id": self._next_internal_id,
+        await run_in_index_thread(faiss.write_index, self.index, index_path)
+        await run_in_index_thread(drop_page_cache, index_path)
+        
+        # IDs live in the FAISS file; only the small remaining state goes to JSON
+        if os.path.exists(f"{index_path}.ids.npy"):
+            os.remove(f"{index_path}.ids.npy")
+        
+        # Until training, vectors live only in the buffer; keep them on disk too
+        buffer_path = f"{index_path}.buffer.npz"
+        if not self._is_trained and self._training_fill:
+            fill = self._training_fill
+            await run_in_index_thread(
+                lambda: np.savez(
+                    buffer_path,
+                    vectors=self._training_vectors[:fill],
+                    ids=np.asarray(self._training_ids, dtype=np.int64),
+                )
+            )
+        elif os.path.exists(buffer_path):
+            os.remove(buffer_path)
+        with open(f"{index_path}.meta.json", "wb") as f:
+            f.write(orjson.dumps({
+                "format_version": INDEX_FORMAT_VERSION,
+                "type": "faiss_ivfpq",
                 "is_trained": self._is_trained,
                 "config": {
                     "dimension": self.dimension,
                     "nlist": self.nlist,
                     "m": self.m,
                     "nbits": self.nbits,
+                    "quantization": self.quantization,
                 },
-            }, f)
+            }))
 
     async def load(self, path: str) -> None:
         """Load index from disk"""
         index_path = f"{path}.ivfpq"
         if os.path.exists(index_path):
-            self.index = await asyncio.to_thread(faiss.read_index, index_path)
-            
+            # Read-only replicas map the inverted lists instead of reading them
+            # into the heap; searches fault in only the probed lists' pages
+            meta_path = f"{index_path}.meta.json"
             metadata_path = f"{path}.metadata"
-            if os.path.exists(metadata_path):
+            ids_path = f"{index_path}.ids.npy"
+            io_flags = 0
+            if settings.index_mmap:
+                legacy_pickle = not os.path.exists(meta_path) and os.path.exists(metadata_path)
+                if os.path.exists(ids_path) or legacy_pickle:
+                    # Legacy layouts rewrite the list IDs on load, which the
+                    # read-only mapped lists do not allow
+                    raise RuntimeError(
+                        f"Index at {path} uses a legacy layout that cannot be memory-mapped; "
+                        "load and save it once with INDEX_MMAP unset to convert it"
+                    )
+                io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+            index = await run_in_index_thread(faiss.read_index, index_path, io_flags)
+            self._read_only = bool(io_flags)
+            
+            if os.path.exists(meta_path):
+                with open(meta_path, "rb") as f:
+                    data = orjson.loads(f.read())
+                version = data.get("format_version", 0)
+                if version > INDEX_FORMAT_VERSION:
+                    raise RuntimeError(f"Unsupported index format version {version} at {path}")
+                if os.path.exists(ids_path):
+                    # Sequential IDs with a separate mapping array
+                    _rewrite_list_ids(index, await run_in_index_thread(np.load, ids_path))
+                self._is_trained = data["is_trained"]
+            elif os.path.exists(metadata_path):
+                # Older releases stored sequential IDs plus a pickled dict mapping
                 with open(metadata_path, "rb") as f:
                     data = pickle.load(f)
-                    self.id_map = data["id_map"]
-                    self.reverse_id_map = data["reverse_id_map"]
-                    self._next_internal_id = data["next_internal_id"]
-                    self._is_trained = data["is_trained"]
+                id_array = np.full(data["next_internal_id"], -1, dtype=np.int64)
+                for internal_id, external_id in data["id_map"].items():
+                    id_array[internal_id] = external_id
+                _rewrite_list_ids(index, id_array)
+                self._is_trained = data["is_trained"]
             
+            self.index = index
+            self._release_training()
+            buffer_path = f"{index_path}.buffer.npz"
+            if not self._is_trained and os.path.exists(buffer_path):
+                # Vectors saved while still waiting for enough training samples
+                with np.load(buffer_path) as buffer:
+                    self._buffer_training(buffer["vectors"], buffer["ids"].tolist())
+            self._apply_search_params()
+            if self.rescore_multiplier > 1 and isinstance(self.index, faiss.IndexIDMap2):
+                faiss.downcast_index(self.index.index).k_factor = self.rescore_multiplier
             INDEX_SIZE.set(self.index.ntotal)
 
     async def remove(self, ids: list[int]) -> None:
         """Remove embeddings by ID"""
-        # IVF-PQ doesn't support efficient removal
-        for external_id in ids:
-            if external_id in self.reverse_id_map:
-                internal_id = self.reverse_id_map[external_id]
-                del self.id_map[internal_id]
-                del self.reverse_id_map[external_id]
+        if self._read_only:
+            raise RuntimeError("Index was loaded memory-mapped read-only (INDEX_MMAP)")
+
+        # A running training owns the buffer and drains the queued adds into
+        # the index; once it is done every vector is in exactly one place
+        await self.wait_for_training()
+        ids = np.asarray(ids, dtype=np.int64)
+        buffered = self._drop_buffered(ids) if self._training_fill else 0
+
+        selector = faiss.IDSelectorBatch(ids)
+        try:
+            removed = await run_in_index_thread(self.index.remove_ids, selector)
+        except RuntimeError:
+            # IndexRefine (IVF_RESCORE_MULTIPLIER > 1) cannot drop vectors
+            logger.warning("Remove not supported with rescoring enabled")
+            return
+        INDEX_SIZE.set(self.index.ntotal)
+        logger.info(f"Removed {removed + buffered} embeddings from index")
 
     async def clear(self) -> None:
         """Clear all embeddings from index"""
+        await self.wait_for_training()
         self.index.reset()
-        self.id_map.clear()
-        self.reverse_id_map.clear()
-        self._next_internal_id = 0
         self._is_trained = False
-        self._training_data.clear()
+        self._release_training()
         INDEX_SIZE.set(0)
 
     async def rebuild(self) -> None:
@@ -205,8 +435,12 @@ class FaissIndexIVFPQ(VectorIndex):
             pass
 
     def size(self) -> int:
-        """Get number of embeddings in index"""
-        return self.index.ntotal if self._is_trained else 0
+        """Get number of embeddings in index, including ones awaiting training"""
+        pending = sum(len(ids) for _, ids in self._pending_add)
+        if self._is_trained:
+            # Training vectors are already in the index while the buffer drains
+            return self.index.ntotal + pending
+        return self.index.ntotal + self._training_fill + pending
 
     def dimension(self) -> int:
         """Get embedding dimension"""
@@ -223,5 +457,22 @@ class FaissIndexIVFPQ(VectorIndex):
             "nlist": self.nlist,
             "m": self.m,
             "nbits": self.nbits,
-            "supports_removal": False,
-        }
\ No newline at end of file
+            "nprobe": self.nprobe,
+            "quantization": self.quantization,
+            "rescore_multiplier": self.rescore_multiplier,
+            "fast_scan": self.fast_scan,
+            "supports_removal": self.rescore_multiplier <= 1,
+        }
+
+
+def _rewrite_list_ids(index: Any, id_array: np.ndarray) -> None:
+    """Translate sequential IDs stored in a legacy IVF index to external IDs"""
+    if not isinstance(faiss.downcast_index(index), faiss.IndexIVF):
+        raise RuntimeError("Legacy IVF index with rescoring must be rebuilt")
+    invlists = faiss.extract_index_ivf(index).invlists
+    for list_no in range(invlists.nlist):
+        size = invlists.list_size(list_no)
+        if size:
+            # View straight onto the list's ID storage and remap in place
+            list_ids = faiss.rev_swig_ptr(invlists.get_ids(list_no), size)
+            list_ids[:] = id_array[list_ids]
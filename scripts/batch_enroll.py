@@ -1,8 +1,10 @@
+import asyncio
 import os
 import json
 import httpx
 
 API_URL = "http://localhost:8000/api/v1"
+MAX_CONCURRENCY = 32
 
 # نجيب المسار المطلق للجذر (المجلد اللي فيه dataset)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # مكان scripts/
@@ -16,46 +18,43 @@ def load_labels(dataset_dir):
             return json.load(f)
     return {}
 
-def create_person(person_id, name=None):
+async def create_person(client, person_id, name=None):
     payload = {
         "id": person_id,
         "name": name or person_id,
         "metadata": {}
     }
-    r = httpx.post(f"{API_URL}/persons", json=payload)
+    r = await client.post("/persons", json=payload)
     if r.status_code not in [200, 201]:
         print(f"[!] Failed to create person {person_id}: {r.text}")
     else:
         print(f"[+] Person {person_id} ({name}) created/exists")
 
-def enroll_person_images(person_id, image_paths):
-    files = [("images", (os.path.basename(p), open(p, "rb"), "image/jpeg")) for p in image_paths]
-    r = httpx.post(f"{API_URL}/enroll/{person_id}", files=files)
-    for f in files:
-        f[1][1].close()
+def read_image(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+async def enroll_person_images(client, person_id, image_paths):
+    # Read bytes up front so no file handles stay open across the request
+    contents = await asyncio.gather(*(asyncio.to_thread(read_image, p) for p in image_paths))
+    files = [
+        ("images", (os.path.basename(p), data, "image/jpeg"))
+        for p, data in zip(image_paths, contents, strict=True)
+    ]
+    r = await client.post(f"/enroll/{person_id}", files=files)
 
     if r.status_code == 200:
         return r.json()
     else:
         return {"status": "failed", "error": r.text}
 
-def batch_enroll(dataset_dir=DATASET_DIR):
-    labels = load_labels(dataset_dir)
-    print("Loaded labels:", labels)  # Debug عشان تتأكد إنه شاف الملف
-    summary = {}
-
-    for person_id in os.listdir(dataset_dir):
-        person_dir = os.path.join(dataset_dir, person_id)
-        if not os.path.isdir(person_dir):
-            continue
-
-        # 1) Get name from labels.json (if available)
-        name = labels.get(person_id, person_id)
-
-        # 2) Create person
-        create_person(person_id, name=name)
+async def enroll_one(client, semaphore, person_id, person_dir, name):
+    # Bound in-flight persons so only MAX_CONCURRENCY image sets sit in memory
+    async with semaphore:
+        # 1) Create person
+        await create_person(client, person_id, name=name)
 
-        # 3) Collect all images
+        # 2) Collect all images
         image_paths = [
             os.path.join(person_dir, f)
             for f in os.listdir(person_dir)
@@ -64,22 +63,49 @@ def batch_enroll(dataset_dir=DATASET_DIR):
 
         if not image_paths:
             print(f"[!] No images found for {person_id}")
-            continue
+            return None
 
-        # 4) Enroll images
-        result = enroll_person_images(person_id, image_paths)
+        # 3) Enroll images
+        result = await enroll_person_images(client, person_id, image_paths)
 
-        faces_enrolled = result.get("faces_enrolled", 0)
-        status = result.get("status", "failed")
-        errors = result.get("errors")
+    return {
+        "name": name,
+        "total_images": len(image_paths),
+        "faces_enrolled": result.get("faces_enrolled", 0),
+        "status": result.get("status", "failed"),
+        "errors": result.get("errors"),
+    }
 
-        summary[person_id] = {
-            "name": name,
-            "total_images": len(image_paths),
-            "faces_enrolled": faces_enrolled,
-            "status": status,
-            "errors": errors,
-        }
+async def batch_enroll(dataset_dir=DATASET_DIR):
+    labels = load_labels(dataset_dir)
+    print("Loaded labels:", labels)  # Debug عشان تتأكد إنه شاف الملف
+
+    person_ids = [
+        person_id
+        for person_id in os.listdir(dataset_dir)
+        if os.path.isdir(os.path.join(dataset_dir, person_id))
+    ]
+
+    # One pooled client: persons enroll concurrently over kept-alive connections
+    limits = httpx.Limits(
+        max_connections=MAX_CONCURRENCY, max_keepalive_connections=MAX_CONCURRENCY
+    )
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    async with httpx.AsyncClient(base_url=API_URL, timeout=60, limits=limits) as client:
+        results = await asyncio.gather(*(
+            # Name comes from labels.json (if available)
+            enroll_one(
+                client, semaphore, person_id,
+                os.path.join(dataset_dir, person_id), labels.get(person_id, person_id),
+            )
+            for person_id in person_ids
+        ))
+
+    summary = {
+        person_id: result
+        for person_id, result in zip(person_ids, results, strict=True)
+        if result is not None
+    }
 
     # === Print final summary ===
     print("\n=== Enrollment Summary ===")
@@ -93,4 +119,4 @@ def batch_enroll(dataset_dir=DATASET_DIR):
     print("==========================")
 
 if __name__ == "__main__":
-    batch_enroll(DATASET_DIR)
+    asyncio.run(batch_enroll(DATASET_DIR))
@@ -5,9 +5,10 @@ from core.database import get_db_context
 
 async def reset_db():
     async with get_db_context() as session:
-        await session.execute(text("TRUNCATE TABLE faces CASCADE;"))
-        await session.execute(text("TRUNCATE TABLE enrollments CASCADE;"))
-        await session.execute(text("TRUNCATE TABLE persons CASCADE;"))
+        # One statement: a single round-trip, and all three tables empty atomically
+        await session.execute(
+            text("TRUNCATE TABLE faces, enrollments, persons RESTART IDENTITY CASCADE;")
+        )
         await session.commit()
         print("[✓] All persons, faces, and enrollments deleted.")
 
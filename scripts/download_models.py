@@ -3,6 +3,7 @@
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add parent directory to path
@@ -11,6 +12,22 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from insightface.app import FaceAnalysis
 
 
+def _download_one(model_name: str) -> None:
+    """Download and prepare a single model pack"""
+    print(f"\nDownloading {model_name}...")
+    try:
+        # Initialize will trigger download
+        app = FaceAnalysis(
+            name=model_name,
+            providers=['CPUExecutionProvider'],
+            download=True
+        )
+        app.prepare(ctx_id=0)
+        print(f"✓ {model_name} downloaded successfully")
+    except Exception as e:
+        print(f"✗ Failed to download {model_name}: {e}")
+
+
 def download_models():
     """Download InsightFace models"""
     print("Downloading InsightFace models...")
@@ -21,19 +38,9 @@ def download_models():
         "buffalo_s",  # Small model (fastest)
     ]
     
-    for model_name in models:
-        print(f"\nDownloading {model_name}...")
-        try:
-            # Initialize will trigger download
-            app = FaceAnalysis(
-                name=model_name,
-                providers=['CPUExecutionProvider'],
-                download=True
-            )
-            app.prepare(ctx_id=0)
-            print(f"✓ {model_name} downloaded successfully")
-        except Exception as e:
-            print(f"✗ Failed to download {model_name}: {e}")
+    # Downloads are network-bound, so fetch all packs at once
+    with ThreadPoolExecutor(max_workers=len(models)) as executor:
+        list(executor.map(_download_one, models))
     
     # Print model location
     home = Path.home()
@@ -9,7 +9,7 @@ import uuid
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 
 from core.database import get_db_context, engine
 from core.models import Base, Person, Face, Enrollment
@@ -65,24 +65,23 @@ async def verify_database():
     """Verify database connection and tables"""
     try:
         async with get_db_context() as session:
-            # Test query
-            result = await session.execute(select(Person))
-            persons = result.scalars().all()
+            # All table counts in one round-trip
+            result = await session.execute(
+                select(
+                    select(func.count(Person.id)).scalar_subquery(),
+                    select(func.count(Face.id)).scalar_subquery(),
+                    select(func.count(Enrollment.id)).scalar_subquery(),
+                )
+            )
+            person_count, face_count, enrollment_count = result.one()
 
             print(f"✓ Database connection successful")
-            print(f"  Found {len(persons)} persons in database")
-
-            # Show table counts
-            from sqlalchemy import func
-
-            person_count = await session.execute(select(func.count(Person.id)))
-            face_count = await session.execute(select(func.count(Face.id)))
-            enrollment_count = await session.execute(select(func.count(Enrollment.id)))
+            print(f"  Found {person_count} persons in database")
 
             print(f"\nTable Statistics:")
-            print(f"  Persons:     {person_count.scalar()}")
-            print(f"  Faces:       {face_count.scalar()}")
-            print(f"  Enrollments: {enrollment_count.scalar()}")
+            print(f"  Persons:     {person_count}")
+            print(f"  Faces:       {face_count}")
+            print(f"  Enrollments: {enrollment_count}")
 
     except Exception as e:
         print(f"✗ Database verification failed: {e}")
@@ -7,17 +7,20 @@ import sys
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 
 from core.database import get_db_context
 from core.models import Face
 from indexing import get_index, save_index
+from indexing.base import embeddings_from_blobs
 from services.face_engine import get_face_engine
 from utils.logging import get_logger, setup_logging
 
 setup_logging()
 logger = get_logger(__name__)
 
+BATCH_SIZE = 1000
+
 
 async def reindex():
     """Rebuild index from database"""
@@ -29,32 +32,29 @@ async def reindex():
     # Clear existing index
     await index.clear()
     
-    # Load all faces from database
     async with get_db_context() as session:
-        result = await session.execute(select(Face))
-        faces = result.scalars().all()
-        
-        logger.info(f"Found {len(faces)} faces to index")
+        # Faces enrolled before embeddings were persisted have none to index
+        has_embedding = Face.embedding.is_not(None)
+        total = await session.scalar(select(func.count(Face.id)).where(has_embedding))
+        logger.info(f"Found {total} faces to index")
         
-        # In production, you'd load actual embeddings
-        # For now, this is a placeholder
-        embeddings = []
-        ids = []
+        # Size index storage once instead of growing it batch by batch
+        await index.reserve(total)
         
-        for face in faces:
-            # Load embedding from storage or regenerate
-            # embedding = load_embedding(face)
-            # embeddings.append(embedding)
-            ids.append(face.embedding_id)
+        # Stream stored embeddings through a server-side cursor so memory
+        # stays flat regardless of how many faces exist
+        result = await session.stream(
+            select(Face.embedding_id, Face.embedding)
+            .where(has_embedding)
+            .execution_options(yield_per=BATCH_SIZE)
+        )
         
-        if embeddings:
-            # Add to index in batches
-            batch_size = 1000
-            for i in range(0, len(embeddings), batch_size):
-                batch_emb = embeddings[i:i+batch_size]
-                batch_ids = ids[i:i+batch_size]
-                await index.add(batch_emb, batch_ids)
-                logger.info(f"Indexed batch {i//batch_size + 1}")
+        batch_num = 0
+        async for rows in result.partitions():
+            batch_ids, blobs = zip(*rows, strict=True)
+            await index.add(embeddings_from_blobs(blobs), list(batch_ids))
+            batch_num += 1
+            logger.info(f"Indexed batch {batch_num}")
     
     # Save index
     await save_index()
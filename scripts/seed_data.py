@@ -21,10 +21,7 @@ async def seed_data():
     ]
     
     async with get_db_context() as session:
-        for person_data in sample_persons:
-            person = Person(**person_data)
-            session.add(person)
-        
+        session.add_all([Person(**person_data) for person_data in sample_persons])
         await session.commit()
         print(f"Seeded {len(sample_persons)} persons")
 
@@ -3,19 +3,23 @@ Background job processing with Celery
 """
 
 import asyncio
-import json
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from celery import Celery, Task
+from celery.signals import worker_process_init, worker_process_shutdown
 from celery.utils.log import get_task_logger
-from sqlalchemy import select
+import numpy as np
+from sqlalchemy import delete, select
 
-from core.database import get_db_context
+from api.config import settings
+from core.database import engine, get_db_context
 from core.models import Enrollment, Face, Person
 from indexing import get_index, save_index
+from indexing.base import embeddings_from_blobs, embeddings_to_blobs
+from services.enrollment_service import allocate_embedding_ids
 from services.face_engine import get_face_engine
-from utils.image_utils import validate_image, pil_to_cv2
+from utils.image_utils import decode_image
 
 # Configure Celery
 celery_app = Celery(
@@ -37,22 +41,60 @@ celery_app.conf.update(
     },
     task_time_limit=300,  # 5 minutes
     task_soft_time_limit=240,  # 4 minutes
+    # Long enrollment jobs: reserve one task at a time so a busy worker doesn't
+    # hold queued jobs others could run, and ack only after completion
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    worker_max_tasks_per_child=100,  # Recycle children to cap leaked memory
 )
 
 logger = get_task_logger(__name__)
 
+# One event loop per worker process, reused by every task. The async DB
+# engine's pooled connections are bound to the loop that opened them, so a
+# fresh loop per task would mean reconnecting on every task.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def run_async(coro):
+    """Run a coroutine to completion on this process's event loop"""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+
+@worker_process_init.connect
+def _init_worker_loop(**kwargs):
+    """Start each worker child with its own loop and warm models and index"""
+    global _loop
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+    
+    # Load models and the index now so the first task doesn't pay for it;
+    # on failure tasks still initialize them lazily
+    try:
+        get_face_engine().warmup()
+        _loop.run_until_complete(get_index())
+    except Exception as e:
+        logger.warning(f"Worker warmup failed: {e}")
+
+
+@worker_process_shutdown.connect
+def _close_worker_loop(**kwargs):
+    """Close pooled connections and the loop on worker exit"""
+    if _loop is not None and not _loop.is_closed():
+        _loop.run_until_complete(engine.dispose())
+        _loop.close()
+
 
 class AsyncTask(Task):
     """Base task with async support"""
     
     def run(self, *args, **kwargs):
         """Run task in async context"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self.async_run(*args, **kwargs))
-        finally:
-            loop.close()
+        return run_async(self.async_run(*args, **kwargs))
     
     async def async_run(self, *args, **kwargs):
         """Override this in subclasses"""
@@ -84,6 +126,8 @@ class BatchEnrollmentTask(AsyncTask):
             await session.commit()
             
             face_engine = get_face_engine()
+            faces = []
+            embeddings = []
             successful = 0
             failed = 0
             
@@ -91,25 +135,20 @@ class BatchEnrollmentTask(AsyncTask):
                 try:
                     # Process image
                     image_bytes = img_data['data']
-                    pil_image = validate_image(image_bytes)
-                    cv2_image = pil_to_cv2(pil_image)
+                    cv2_image = decode_image(
+                        image_bytes, max_side=settings.image_decode_max_side
+                    )
                     
                     # Extract face
                     face_data, embedding = face_engine.process_single_face(cv2_image)
                     
-                    # Add to index
-                    index = await get_index()
-                    embedding_id = index.size()
-                    await index.add(embedding.reshape(1, -1), [embedding_id])
-                    
-                    # Save face record
-                    face = Face(
+                    # Face record; indexed with the rest of the batch below
+                    faces.append(Face(
                         person_id=person_id,
-                        embedding_id=embedding_id,
                         quality_score=img_data.get('quality_score'),
-                        face_bbox=json.dumps(face_data['bbox']),
-                    )
-                    session.add(face)
+                        face_bbox=face_data['bbox'].tolist(),
+                    ))
+                    embeddings.append(embedding)
                     
                     successful += 1
                     
@@ -124,6 +163,19 @@ class BatchEnrollmentTask(AsyncTask):
                     logger.error(f"Failed to process image: {e}")
                     failed += 1
             
+            # Add all extracted embeddings to the index in one call
+            if faces:
+                index = await get_index()
+                embedding_ids = await allocate_embedding_ids(session, len(faces))
+                matrix = np.stack(embeddings).astype(np.float32, copy=False)
+                await index.add(matrix, embedding_ids)
+                for face, embedding_id, blob in zip(
+                    faces, embedding_ids, embeddings_to_blobs(matrix), strict=True
+                ):
+                    face.embedding_id = embedding_id
+                    face.embedding = blob
+                session.add_all(faces)
+            
             # Update enrollment
             enrollment.status = "completed"
             enrollment.face_count = successful
@@ -152,28 +204,26 @@ def reindex_task():
         await index.clear()
         
         async with get_db_context() as session:
-            result = await session.execute(select(Face))
-            faces = result.scalars().all()
-            
-            # In production, load actual embeddings from storage
-            # This is simplified for demonstration
+            # Stream stored embeddings in batches; faces enrolled before
+            # embeddings were persisted have none and are skipped
+            result = await session.stream(
+                select(Face.embedding_id, Face.embedding)
+                .where(Face.embedding.is_not(None))
+                .execution_options(yield_per=1000)
+            )
             
-            batch_size = 1000
-            for i in range(0, len(faces), batch_size):
-                batch = faces[i:i+batch_size]
-                # Process batch
-                logger.info(f"Reindexed batch {i//batch_size + 1}")
+            batch_num = 0
+            async for rows in result.partitions():
+                ids, blobs = zip(*rows, strict=True)
+                await index.add(embeddings_from_blobs(blobs), list(ids))
+                batch_num += 1
+                logger.info(f"Reindexed batch {batch_num}")
             
             await save_index()
     
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        loop.run_until_complete(_reindex())
-        logger.info("Reindex completed")
-        return {"status": "completed"}
-    finally:
-        loop.close()
+    run_async(_reindex())
+    logger.info("Reindex completed")
+    return {"status": "completed"}
 
 
 @celery_app.task(name='face_recognition.cleanup_old_data')
@@ -187,27 +237,18 @@ def cleanup_old_data_task(days: int = 90):
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
         async with get_db_context() as session:
-            # Delete old enrollments
+            # Delete old enrollments in one statement (range scan on
+            # idx_enrollment_created_at) instead of loading each row
             result = await session.execute(
-                select(Enrollment).where(Enrollment.created_at < cutoff_date)
+                delete(Enrollment).where(Enrollment.created_at < cutoff_date)
             )
-            old_enrollments = result.scalars().all()
-            
-            for enrollment in old_enrollments:
-                await session.delete(enrollment)
-            
             await session.commit()
             
-            return len(old_enrollments)
+            return result.rowcount
     
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        deleted_count = loop.run_until_complete(_cleanup())
-        logger.info(f"Deleted {deleted_count} old enrollments")
-        return {"deleted": deleted_count}
-    finally:
-        loop.close()
+    deleted_count = run_async(_cleanup())
+    logger.info(f"Deleted {deleted_count} old enrollments")
+    return {"deleted": deleted_count}
 
 
 # Celery Beat Schedule for periodic tasks
@@ -1,12 +1,13 @@
 import asyncio
-import json
 import time
 import uuid
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Optional
 from api.config import settings
 import numpy as np
-from sqlalchemy import select
+from fastapi import UploadFile
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db_context
@@ -14,13 +15,15 @@ from core.exceptions import (
     LowQualityFaceException,
     PersonNotFoundException,
 )
-from core.models import Enrollment, Face, Person
+from core.models import Enrollment, Face, Person, embedding_id_seq
 from core.schemas import EnrollmentResponse
 from indexing import get_index, save_index
+from indexing.base import embeddings_to_blobs
 from services.face_engine import get_face_engine
 from services.face_quality import get_quality_analyzer
+from services.identification_service import invalidate_match_cache
 from services.liveness import get_liveness_service
-from utils.image_utils import pil_to_cv2, save_image_to_disk, validate_image
+from utils.image_utils import decode_image, save_image_to_disk
 from utils.logging import get_logger
 from utils.metrics import track_enrollment
 
@@ -38,15 +41,25 @@ class EnrollmentService:
     async def enroll_faces(
         self,
         person_id: str,
-        images: list[bytes],
+        images: list[UploadFile],
         quality_threshold: Optional[float] = None,
         update_if_exists: bool = True,
     ) -> EnrollmentResponse:
-        """Enroll multiple face images for a person"""
-        start_time = time.time()
+        """Enroll multiple face images for a person
+
+        Images are processed concurrently off the event loop. Uploads are read
+        only once a worker slot is free and closed once processed, so at most
+        settings.enrollment_workers images are resident regardless of batch size.
+        """
+        start_time = time.perf_counter()
         enrollment_id = uuid.uuid4()
 
         async with get_db_context() as session:
+            # Check if person exists (or create if not). Nothing is flushed until
+            # the final commit, which inserts the person, the enrollment and
+            # every face in one round trip
+            person = await self._get_or_create_person(session, person_id)
+
             # Create enrollment record
             enrollment = Enrollment(
                 id=enrollment_id,
@@ -54,28 +67,34 @@ class EnrollmentService:
                 status="processing",
             )
             session.add(enrollment)
-            await session.flush()
 
             try:
-                # Check if person exists (or create if not)
-                person = await self._get_or_create_person(session, person_id)
-
-                # Process each image
-                successful_faces = []
-                failed_faces = []
-
-                for img_bytes in images:
-                    try:
-                        face_data = await self._process_single_image(
-                            session,
-                            person_id,
-                            img_bytes,
-                            quality_threshold,
-                        )
-                        successful_faces.append(face_data)
-                    except Exception as e:
-                        logger.error(f"Failed to process image", error=str(e))
-                        failed_faces.append(str(e))
+                # Process images concurrently; detection and quality checks are
+                # CPU-bound, so they run in worker threads
+                semaphore = asyncio.Semaphore(settings.enrollment_workers)
+
+                async def process(image: UploadFile) -> Any:
+                    async with semaphore:
+                        try:
+                            image_bytes = await image.read()
+                            return await asyncio.to_thread(
+                                self._process_single_image,
+                                person_id,
+                                image_bytes,
+                                quality_threshold,
+                            )
+                        except Exception as e:
+                            logger.error(f"Failed to process image", error=str(e))
+                            return e
+                        finally:
+                            await image.close()
+
+                results = await asyncio.gather(*(process(image) for image in images))
+                successful_faces = [r for r in results if not isinstance(r, Exception)]
+                failed_faces = [str(r) for r in results if isinstance(r, Exception)]
+
+                # Index all accepted faces with a single add
+                await self._index_faces(session, successful_faces)
 
                 # Update enrollment
                 enrollment.face_count = len(successful_faces)
@@ -86,6 +105,7 @@ class EnrollmentService:
                     enrollment.error_message = "; ".join(failed_faces)
 
                 await session.commit()
+                invalidate_match_cache()
 
                 # Save index to disk
                 await save_index()
@@ -93,10 +113,10 @@ class EnrollmentService:
                 # Track metrics
                 track_enrollment("completed" if successful_faces else "failed")
 
-                processing_time = (time.time() - start_time) * 1000
+                processing_time = (time.perf_counter() - start_time) * 1000
 
                 # Build response compatible with schema
-                return EnrollmentResponse(
+                return EnrollmentResponse.model_construct(
                     enrollment_id=enrollment_id,
                     person_id=person_id,
                     faces_enrolled=len(successful_faces),
@@ -111,17 +131,17 @@ class EnrollmentService:
                 track_enrollment("failed")
                 raise
 
-    async def _process_single_image(
+    def _process_single_image(
         self,
-        session: AsyncSession,
         person_id: str,
         image_bytes: bytes,
         quality_threshold: Optional[float],
     ) -> dict[str, Any]:
-        """Process single image for enrollment"""
-        # Validate image
-        pil_image = validate_image(image_bytes)
-        cv2_image = pil_to_cv2(pil_image)
+        """Process single image for enrollment; indexing is left to the caller
+        CPU-bound and session-free, so it runs in a worker thread.
+        """
+        # Validate and decode straight to BGR
+        cv2_image = decode_image(image_bytes, max_side=settings.image_decode_max_side)
 
         # Detect and extract face
         face_data, embedding = self.face_engine.process_single_face(cv2_image)
@@ -136,41 +156,50 @@ class EnrollmentService:
         # Check liveness
         liveness_result = self.liveness_service.check_liveness(cv2_image, face_data)
 
-        # Get vector index
-        index = await get_index()
-
-        # Generate embedding ID
-        embedding_id = index.size()  # Use current size as ID
-
-        # Add to index
-        await index.add(embedding.reshape(1, -1), [embedding_id])
-
-        # Save face record
+        # Face record; embedding_id is assigned when the batch is indexed
+        landmarks = face_data.get("landmarks")
         face = Face(
             person_id=person_id,
-            embedding_id=embedding_id,
             quality_score=quality_result["overall_score"],
-            face_bbox=json.dumps(face_data["bbox"]),
-            landmarks=json.dumps(face_data.get("landmarks")),
+            face_bbox=face_data["bbox"].tolist(),
+            landmarks=landmarks.tolist() if landmarks is not None else None,
         )
 
         # Optionally save image
         if settings.enable_image_storage:
             image_path = save_image_to_disk(
-                pil_image,
+                cv2_image,
                 settings.image_storage_path,
             )
             face.image_path = image_path
 
-        session.add(face)
-        await session.flush()
-
         return {
-            "face_id": face.id,
+            "face": face,
+            "embedding": embedding,
             "quality_score": quality_result["overall_score"],
             "liveness": liveness_result,
         }
 
+    async def _index_faces(
+        self, session: AsyncSession, faces: list[dict[str, Any]]
+    ) -> None:
+        """Add processed faces to the index in one call and persist them"""
+        if not faces:
+            return
+
+        index = await get_index()
+
+        embedding_ids = await allocate_embedding_ids(session, len(faces))
+        embeddings = np.stack([f["embedding"] for f in faces]).astype(np.float32, copy=False)
+        await index.add(embeddings, embedding_ids)
+
+        blobs = embeddings_to_blobs(embeddings)
+        for face_data, embedding_id, blob in zip(faces, embedding_ids, blobs, strict=True):
+            face_data["face"].embedding_id = embedding_id
+            face_data["face"].embedding = blob
+        # Inserted with the enrollment on commit as one multi-row INSERT
+        session.add_all(f["face"] for f in faces)
+
     async def _get_or_create_person(
         self, session: AsyncSession, person_id: str
     ) -> Person:
@@ -183,7 +212,6 @@ class EnrollmentService:
         if not person:
             person = Person(id=person_id)
             session.add(person)
-            await session.flush()
 
         return person
 
@@ -207,18 +235,21 @@ class EnrollmentService:
                 person.name = name
 
             if metadata is not None:
-                person.metadata = json.dumps(metadata)
+                person.person_metadata = metadata
 
             await session.commit()
+            invalidate_match_cache()
 
 
-# Global instance
-_enrollment_service: Optional[EnrollmentService] = None
+async def allocate_embedding_ids(session: AsyncSession, count: int) -> list[int]:
+    """Draw count unused embedding IDs from the database sequence"""
+    result = await session.scalars(
+        select(embedding_id_seq.next_value()).select_from(func.generate_series(1, count))
+    )
+    return list(result)
 
 
+@lru_cache(maxsize=1)
 def get_enrollment_service() -> EnrollmentService:
     """Get or create enrollment service instance"""
-    global _enrollment_service
-    if _enrollment_service is None:
-        _enrollment_service = EnrollmentService()
-    return _enrollment_service
+    return EnrollmentService()
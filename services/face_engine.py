@@ -1,10 +1,9 @@
 import time
-from typing import Any, Optional, Tuple
+from functools import lru_cache
+from typing import Any, Tuple
 
 import cv2
 import numpy as np
-from insightface.app import FaceAnalysis
-from insightface.model_zoo import get_model
 
 from api.config import settings
 from core.constants import DETECTOR_BACKENDS, INSIGHTFACE_MODELS
@@ -22,6 +21,11 @@ from utils.metrics import (
 
 logger = get_logger(__name__)
 
+# Label-bound detection counters, resolved once rather than per image
+_DETECTIONS_OK = FACE_DETECTION_COUNT.labels(status="success", reason="detected")
+_DETECTIONS_NONE = FACE_DETECTION_COUNT.labels(status="no_face", reason="none_detected")
+_DETECTIONS_FAILED = FACE_DETECTION_COUNT.labels(status="error", reason="detection_failed")
+
 
 class FaceEngine:
     """Face detection and embedding extraction engine using InsightFace"""
@@ -42,6 +46,10 @@ class FaceEngine:
             device=self.device,
         )
 
+        # Deferred: importing insightface pulls in matplotlib/albumentations and
+        # dominates cold start, so only pay for it when the engine is built
+        from insightface.app import FaceAnalysis
+
         # Initialize FaceAnalysis with specified model
         self.app = FaceAnalysis(
             name=INSIGHTFACE_MODELS.get(self.face_model, "buffalo_l"),
@@ -49,6 +57,9 @@ class FaceEngine:
             allowed_modules=["detection", "recognition"],
         )
 
+        if settings.ort_intra_op_threads > 0:
+            self._limit_ort_threads(settings.ort_intra_op_threads)
+
         # Configure detector backend
         detector_config = DETECTOR_BACKENDS[self.detector_backend]
         self.app.prepare(ctx_id=0, det_thresh=detector_config["conf_threshold"])
@@ -59,6 +70,38 @@ class FaceEngine:
 
         logger.info("Face engine initialized successfully")
 
+    def warmup(self) -> None:
+        """Run detection and recognition once on blank input, so ONNX Runtime
+        allocates its buffers before the first real image"""
+        self.app.det_model.detect(
+            np.zeros((640, 640, 3), dtype=np.uint8), max_num=0, metric="default"
+        )
+        recognizer = self.app.models["recognition"]
+        size = recognizer.input_size[0]
+        recognizer.get_feat([np.zeros((size, size, 3), dtype=np.uint8)])
+
+    def _limit_ort_threads(self, threads: int) -> None:
+        """Recreate model sessions with a fixed intra-op thread count
+
+        FaceAnalysis doesn't forward SessionOptions, and ORT's default of one
+        thread per core oversubscribes the host when several worker processes
+        each run their own sessions.
+        """
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        for model in self.app.models.values():
+            model.session = onnxruntime.InferenceSession(
+                model.model_file,
+                sess_options=options,
+                providers=model.session.get_providers(),
+            )
+
     def _setup_retinaface(self):
         """Setup RetinaFace detector"""
         # RetinaFace is already included in buffalo models
@@ -67,27 +110,28 @@ class FaceEngine:
 
     def detect_faces(self, image: np.ndarray) -> list[dict[str, Any]]:
         """Detect faces in image"""
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         try:
-            faces = self.app.get(image)
-            duration = time.time() - start_time
+            faces = self._detect_and_embed(image)
+            duration = time.perf_counter() - start_time
             FACE_DETECTION_DURATION.observe(duration)
 
             if not faces:
-                FACE_DETECTION_COUNT.labels(status="no_face", reason="none_detected").inc()
+                _DETECTIONS_NONE.inc()
                 raise NoFaceDetectedException()
 
-            FACE_DETECTION_COUNT.labels(status="success", reason="detected").inc()
+            _DETECTIONS_OK.inc()
 
             # Convert InsightFace format to our format
             face_data = []
             for face in faces:
                 face_data.append({
-                    "bbox": face.bbox.tolist(),
-                    "landmarks": face.kps.tolist() if face.kps is not None else None,
+                    # Kept as arrays; converted to lists only where stored
+                    "bbox": face.bbox,
+                    "landmarks": face.kps,
                     "det_score": float(face.det_score),
-                    "embedding": face.normed_embedding,  # L2-normalized by default
+                    "embedding": face.embedding,  # L2-normalized in _detect_and_embed
                     "face": face,
                 })
 
@@ -98,20 +142,45 @@ class FaceEngine:
             if isinstance(e, NoFaceDetectedException):
                 raise
             logger.error("Face detection failed", error=str(e))
-            FACE_DETECTION_COUNT.labels(status="error", reason="detection_failed").inc()
+            _DETECTIONS_FAILED.inc()
             raise InvalidImageException(f"Face detection failed: {str(e)}")
 
+    def _detect_and_embed(self, image: np.ndarray) -> list:
+        """Detect faces, then embed all aligned crops in one recognition batch
+
+        FaceAnalysis.get runs the recognition model once per face; this
+        mirrors it but issues a single (N, 3, 112, 112) inference instead.
+        """
+        from insightface.app.common import Face
+        from insightface.utils import face_align
+
+        bboxes, kpss = self.app.det_model.detect(image, max_num=0, metric="default")
+        if bboxes.shape[0] == 0:
+            return []
+
+        recognizer = self.app.models["recognition"]
+        crops = [
+            face_align.norm_crop(image, landmark=kps, image_size=recognizer.input_size[0])
+            for kps in kpss
+        ]
+        embeddings = recognizer.get_feat(crops)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+        faces = []
+        for bbox, kps, embedding in zip(bboxes, kpss, embeddings, strict=True):
+            face = Face(bbox=bbox[:4], kps=kps, det_score=bbox[4])
+            face.embedding = embedding
+            faces.append(face)
+        return faces
+
     def extract_embedding(self, face_data: dict[str, Any]) -> np.ndarray:
         """Extract face embedding (already extracted during detection)"""
-        start_time = time.time()
+        start_time = time.perf_counter()
 
-        # InsightFace already computes embeddings during detection
+        # Embeddings are computed and L2-normalized during detection
         embedding = face_data["embedding"]
 
-        # Ensure L2 normalization (InsightFace already does this, but double-check)
-        embedding = embedding / np.linalg.norm(embedding)
-
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         FACE_EMBEDDING_DURATION.observe(duration)
 
         return embedding
@@ -161,13 +230,7 @@ class FaceEngine:
         return float(np.dot(embedding1, embedding2))
 
 
-# Global instance
-_face_engine: Optional[FaceEngine] = None
-
-
+@lru_cache(maxsize=1)
 def get_face_engine() -> FaceEngine:
     """Get or create face engine instance"""
-    global _face_engine
-    if _face_engine is None:
-        _face_engine = FaceEngine()
-    return _face_engine
\ No newline at end of file
+    return FaceEngine()
\ No newline at end of file
@@ -1,3 +1,5 @@
+import math
+from functools import lru_cache
 from typing import Any, Optional
 
 import cv2
@@ -23,9 +25,10 @@ class FaceQualityAnalyzer:
 
         # Calculate quality metrics
         size_score = self._calculate_size_score(bbox, image.shape)
-        pose_score = self._calculate_pose_score(landmarks) if landmarks else 0.5
-        sharpness_score = self._calculate_sharpness_score(image, bbox)
-        brightness_score = self._calculate_brightness_score(image, bbox)
+        pose_score = self._calculate_pose_score(landmarks) if landmarks is not None else 0.5
+        sharpness_score, brightness_score = self._calculate_roi_scores(
+            self._crop_face(image, bbox)
+        )
 
         # Combined quality score (weighted average)
         overall_score = (
@@ -68,7 +71,7 @@ class FaceQualityAnalyzer:
         face_area = face_width * face_height
 
         # Face should occupy reasonable portion of image
-        area_ratio = face_area / image_area
+        area_ratio = float(face_area / image_area)
         
         # Ideal ratio between 0.1 and 0.5
         if area_ratio < 0.05:
@@ -78,86 +81,72 @@ class FaceQualityAnalyzer:
         else:
             return min(1.0, area_ratio * 4)
 
-    def _calculate_pose_score(self, landmarks: Optional[list]) -> float:
+    def _calculate_pose_score(self, landmarks: Optional[np.ndarray]) -> float:
         """Calculate face pose score based on landmarks symmetry"""
-        if not landmarks or len(landmarks) < 5:
+        if landmarks is None or len(landmarks) < 5:
             return 0.5
 
-        landmarks = np.array(landmarks)
+        # Plain float math: for five points NumPy's per-call overhead costs
+        # more than the arithmetic itself
+        (lx, ly), (rx, ry), (nose_x, _) = landmarks[:3, :2].tolist()
         
         # Check eye alignment (should be roughly horizontal)
-        left_eye = landmarks[0]
-        right_eye = landmarks[1]
-        eye_angle = np.arctan2(right_eye[1] - left_eye[1], right_eye[0] - left_eye[0])
+        eye_dx = rx - lx
+        eye_angle = math.atan2(ry - ly, eye_dx)
         
         # Penalize large angles
-        angle_penalty = min(abs(eye_angle) / (np.pi / 6), 1.0)
+        angle_penalty = min(abs(eye_angle) / (math.pi / 6), 1.0)
         
         # Check face symmetry
-        nose = landmarks[2]
-        eye_center = (left_eye + right_eye) / 2
-        symmetry = 1.0 - min(abs(nose[0] - eye_center[0]) / (right_eye[0] - left_eye[0]), 1.0)
+        eye_center_x = (lx + rx) / 2
+        symmetry = 0.0 if eye_dx == 0 else 1.0 - min(abs(nose_x - eye_center_x) / eye_dx, 1.0)
         
         return (1.0 - angle_penalty) * 0.5 + symmetry * 0.5
 
-    def _calculate_sharpness_score(self, image: np.ndarray, bbox: list[float]) -> float:
-        """Calculate image sharpness using Laplacian variance"""
+    def _crop_face(self, image: np.ndarray, bbox: list[float]) -> np.ndarray:
+        """Slice the face region, clipped to the image bounds"""
         x1, y1, x2, y2 = [int(coord) for coord in bbox]
-        face_roi = image[y1:y2, x1:x2]
-        
-        if face_roi.size == 0:
-            return 0.0
-        
-        # Convert to grayscale if needed
-        if len(face_roi.shape) == 3:
-            gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = face_roi
-        
-        # Calculate Laplacian variance
-        laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-        variance = laplacian.var()
-        
-        # Normalize to 0-1 range (empirically determined thresholds)
-        score = min(variance / 500.0, 1.0)
-        return score
+        height, width = image.shape[:2]
+        # Detectors can report boxes slightly outside the frame; a negative
+        # start would otherwise wrap around and yield an empty slice
+        return image[max(0, y1):min(height, y2), max(0, x1):min(width, x2)]
 
-    def _calculate_brightness_score(self, image: np.ndarray, bbox: list[float]) -> float:
-        """Calculate brightness/contrast score"""
-        x1, y1, x2, y2 = [int(coord) for coord in bbox]
-        face_roi = image[y1:y2, x1:x2]
-        
+    def _calculate_roi_scores(self, face_roi: np.ndarray) -> tuple[float, float]:
+        """Calculate sharpness and brightness/contrast scores from one grayscale ROI
+
+        Returns: (sharpness_score, brightness_score)
+        """
         if face_roi.size == 0:
-            return 0.0
+            return 0.0, 0.0
         
-        # Convert to grayscale if needed
+        # Convert to grayscale once for both metrics
         if len(face_roi.shape) == 3:
             gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
         else:
             gray = face_roi
         
-        # Calculate mean and std
-        mean = gray.mean()
-        std = gray.std()
+        # Sharpness: Laplacian variance, normalized to 0-1 range
+        # (empirically determined thresholds). An 8-bit Laplacian fits in
+        # int16, which OpenCV computes with integer SIMD kernels
+        laplacian = cv2.Laplacian(gray, cv2.CV_16S)
+        variance = float(cv2.meanStdDev(laplacian)[1][0, 0]) ** 2
+        sharpness_score = min(variance / 500.0, 1.0)
+        
+        # Brightness and contrast in a single pass over the pixels
+        mean, std = (float(v[0, 0]) for v in cv2.meanStdDev(gray))
         
         # Ideal brightness around 127 with good contrast
         brightness_score = 1.0 - abs(mean - 127) / 127
         contrast_score = min(std / 50.0, 1.0)
         
-        return brightness_score * 0.5 + contrast_score * 0.5
+        return sharpness_score, brightness_score * 0.5 + contrast_score * 0.5
 
     def set_threshold(self, threshold: float):
         """Update quality threshold"""
         self.quality_threshold = max(0.0, min(1.0, threshold))
 
 
-# Global instance
-_quality_analyzer: Optional[FaceQualityAnalyzer] = None
-
-
+@lru_cache(maxsize=1)
 def get_quality_analyzer() -> FaceQualityAnalyzer:
     """Get or create quality analyzer instance"""
-    global _quality_analyzer
-    if _quality_analyzer is None:
-        _quality_analyzer = FaceQualityAnalyzer()
-    return _quality_analyzer
\ No newline at end of file
+    return FaceQualityAnalyzer()
\ No newline at end of file
@@ -1,5 +1,7 @@
-import json
+import asyncio
 import time
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Any, Optional
 
 import numpy as np
@@ -10,16 +12,65 @@ from api.config import settings
 from core.database import get_db_context
 from core.models import Face, Person
 from indexing import get_index
+from indexing.base import embeddings_from_blobs
 from services.face_engine import get_face_engine
 from services.face_quality import get_quality_analyzer
 from services.liveness import get_liveness_service
-from utils.image_utils import pil_to_cv2, validate_image
+from utils.image_utils import decode_image
 from utils.logging import get_logger
 from utils.metrics import track_identification, track_similarity_score
 
 logger = get_logger(__name__)
 
 
+class MatchRowCache:
+    """LRU of joined match rows keyed by embedding ID
+    Entries expire after a TTL so writes from other processes are picked up
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._rows: OrderedDict[int, tuple[float, Any]] = OrderedDict()
+
+    def get_many(self, embedding_ids: list[int]) -> dict[int, Any]:
+        """Cached rows for the IDs that have a fresh entry"""
+        found = {}
+        now = time.monotonic()
+        for embedding_id in embedding_ids:
+            entry = self._rows.get(embedding_id)
+            if entry is None:
+                continue
+            if now - entry[0] > self.ttl:
+                del self._rows[embedding_id]
+                continue
+            self._rows.move_to_end(embedding_id)
+            found[embedding_id] = entry[1]
+        return found
+
+    def put_many(self, rows: dict[int, Any]) -> None:
+        """Store rows, evicting the least recently used beyond maxsize"""
+        if self.maxsize <= 0:
+            return
+        now = time.monotonic()
+        for embedding_id, row in rows.items():
+            self._rows[embedding_id] = (now, row)
+            self._rows.move_to_end(embedding_id)
+        while len(self._rows) > self.maxsize:
+            self._rows.popitem(last=False)
+
+    def clear(self) -> None:
+        self._rows.clear()
+
+
+_match_cache = MatchRowCache(settings.match_cache_size, settings.match_cache_ttl)
+
+
+def invalidate_match_cache() -> None:
+    """Drop cached match rows after faces or persons change"""
+    _match_cache.clear()
+
+
 class IdentificationService:
     """Service for face identification"""
 
@@ -36,61 +87,40 @@ class IdentificationService:
         return_face_data: bool = False,
     ) -> dict[str, Any]:
         """Identify a face in the image"""
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         # Use configured defaults if not specified
         threshold = similarity_threshold or settings.similarity_threshold
         k = top_k or settings.top_k_results
 
-        # Validate image
-        pil_image = validate_image(image_bytes)
-        cv2_image = pil_to_cv2(pil_image)
+        # Decode, detect and extract the face off the event loop
+        cv2_image, face_data, embedding = await asyncio.to_thread(self._detect_face, image_bytes)
 
-        # Detect and extract face
-        face_data, embedding = self.face_engine.process_single_face(cv2_image)
-
-        # Check face quality
-        quality_result = self.quality_analyzer.analyze_face(cv2_image, face_data)
-
-        # Check liveness
-        liveness_result = self.liveness_service.check_liveness(cv2_image, face_data)
-
-        # Search in index
-        index = await get_index()
+        # Quality and liveness run on worker threads while the index searches
+        quality_result, liveness_result, search_result = await asyncio.gather(
+            asyncio.to_thread(self.quality_analyzer.analyze_face, cv2_image, face_data),
+            asyncio.to_thread(self.liveness_service.check_liveness, cv2_image, face_data),
+            self._search(embedding, k),
+        )
 
-        if index.size() == 0:
-            logger.warning("Index is empty, no faces enrolled")
+        if search_result is None:
             track_identification("unknown")
             return {
                 "matches": [],
                 "face_quality": quality_result["overall_score"],
-                "processing_time_ms": (time.time() - start_time) * 1000,
+                "processing_time_ms": (time.perf_counter() - start_time) * 1000,
             }
 
-        distances, embedding_ids = await index.search(embedding, k)
-
-        # Convert distances to similarities (cosine similarity)
-        similarities = distances  # Already cosine similarity from IndexFlatIP
+        # Distances are already cosine similarities from the inner-product index
+        similarities, embedding_ids = search_result
 
         # Get person data for matches
-        matches = []
         async with get_db_context() as session:
-            for i, (similarity, embedding_id) in enumerate(zip(similarities, embedding_ids)):
-                if similarity >= threshold:
-                    match_data = await self._get_match_data(
-                        session, int(embedding_id), float(similarity), return_face_data
-                    )
-                    if match_data:
-                        matches.append(match_data)
-                        track_similarity_score(float(similarity))
-
-        # Track identification result
-        if matches:
-            track_identification("matched")
-        else:
-            track_identification("unknown")
+            matches = await self._collect_matches(
+                session, similarities, embedding_ids, threshold, return_face_data
+            )
 
-        processing_time = (time.time() - start_time) * 1000
+        processing_time = (time.perf_counter() - start_time) * 1000
 
         return {
             "matches": matches,
@@ -99,59 +129,188 @@ class IdentificationService:
             "processing_time_ms": processing_time,
         }
 
-    async def _get_match_data(
+    async def identify_faces(
         self,
-        session: AsyncSession,
-        embedding_id: int,
-        similarity: float,
-        include_face_data: bool,
-    ) -> Optional[dict[str, Any]]:
-        """Get match data for a specific embedding ID"""
-        # Find face by embedding ID
-        result = await session.execute(
-            select(Face).where(Face.embedding_id == embedding_id)
-        )
-        face = result.scalar_one_or_none()
+        images_bytes: list[bytes],
+        similarity_threshold: Optional[float] = None,
+        top_k: Optional[int] = None,
+        return_face_data: bool = False,
+    ) -> list[dict[str, Any]]:
+        """Identify the face in each image with a single batched index search
+
+        Images are decoded and analyzed in worker threads, at most
+        settings.enrollment_workers at a time. An image that fails (no face,
+        undecodable) gets an error entry instead of failing the batch.
+        """
+        start_time = time.perf_counter()
+
+        # Use configured defaults if not specified
+        threshold = similarity_threshold or settings.similarity_threshold
+        k = top_k or settings.top_k_results
+
+        # Detect and extract one face per image; detection is CPU-bound
+        semaphore = asyncio.Semaphore(settings.enrollment_workers)
 
-        if not face:
-            logger.warning(f"Face not found for embedding_id {embedding_id}")
+        async def process(image_bytes: bytes) -> Any:
+            async with semaphore:
+                try:
+                    return await asyncio.to_thread(self._analyze_image, image_bytes)
+                except Exception as e:
+                    logger.warning("Batch image failed", error=str(e))
+                    return e
+
+        processed = await asyncio.gather(*(process(image_bytes) for image_bytes in images_bytes))
+        ok = [i for i, item in enumerate(processed) if not isinstance(item, Exception)]
+
+        # One search call for all queries, so the index can batch the GEMM
+        index = await get_index()
+        if not ok or index.size() == 0:
+            if ok:
+                logger.warning("Index is empty, no faces enrolled")
+            distances = np.empty((len(ok), 0), dtype=np.float32)
+            embedding_ids = np.empty((len(ok), 0), dtype=np.int64)
+        else:
+            distances, embedding_ids = await index.search_batch(
+                np.stack([processed[i][1] for i in ok]), k
+            )
+
+        # One DB query resolves the hits of every image
+        hits = [
+            self._select_hits(row_distances, row_ids, threshold)
+            for row_distances, row_ids in zip(distances, embedding_ids, strict=True)
+        ]
+        rows = {}
+        if any(hits):
+            async with get_db_context() as session:
+                rows = await self._fetch_match_rows(
+                    session, list({eid for image_hits in hits for _, eid in image_hits})
+                )
+
+        results = []
+        image_hits = iter(hits)
+        for item in processed:
+            if isinstance(item, Exception):
+                results.append({"matches": [], "face_quality": None, "error": str(item)})
+                continue
+            quality_result, _ = item
+            results.append({
+                "matches": self._build_matches(next(image_hits), rows, return_face_data),
+                "face_quality": quality_result["overall_score"],
+            })
+
+        processing_time = (time.perf_counter() - start_time) * 1000
+        for result in results:
+            result["processing_time_ms"] = processing_time
+
+        return results
+
+    def _detect_face(self, image_bytes: bytes) -> tuple[np.ndarray, dict[str, Any], np.ndarray]:
+        """Decode one image and return it with its face data and embedding"""
+        cv2_image = decode_image(image_bytes, max_side=settings.image_decode_max_side)
+        face_data, embedding = self.face_engine.process_single_face(cv2_image)
+        return cv2_image, face_data, embedding
+
+    def _analyze_image(self, image_bytes: bytes) -> tuple[dict[str, Any], np.ndarray]:
+        """Decode one image and return its face quality and embedding"""
+        cv2_image, face_data, embedding = self._detect_face(image_bytes)
+        return self.quality_analyzer.analyze_face(cv2_image, face_data), embedding
+
+    async def _search(
+        self, embedding: np.ndarray, k: int
+    ) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """Search the index for one embedding, or None when nothing is enrolled"""
+        index = await get_index()
+        if index.size() == 0:
+            logger.warning("Index is empty, no faces enrolled")
             return None
+        return await index.search(embedding, k)
+
+    async def _collect_matches(
+        self,
+        session: AsyncSession,
+        similarities: np.ndarray,
+        embedding_ids: np.ndarray,
+        threshold: float,
+        include_face_data: bool,
+    ) -> list[dict[str, Any]]:
+        """Resolve search hits above the threshold to person matches"""
+        hits = self._select_hits(similarities, embedding_ids, threshold)
+        rows = await self._fetch_match_rows(session, [eid for _, eid in hits])
+        return self._build_matches(hits, rows, include_face_data)
+
+    def _select_hits(
+        self, similarities: np.ndarray, embedding_ids: np.ndarray, threshold: float
+    ) -> list[tuple[float, int]]:
+        """(similarity, embedding_id) pairs that clear the threshold, best first"""
+        similarities = np.asarray(similarities)
+        embedding_ids = np.asarray(embedding_ids)
+        # Negative IDs are padding and removed entries from batched searches
+        mask = (embedding_ids >= 0) & (similarities >= threshold)
+        return list(zip(similarities[mask].tolist(), embedding_ids[mask].tolist()))
+
+    async def _fetch_match_rows(
+        self, session: AsyncSession, embedding_ids: list[int]
+    ) -> dict[int, Any]:
+        """Load face and person fields for all hits, querying only cache misses
+        Returns: mapping of embedding ID to its joined row
+        """
+        rows = _match_cache.get_many(embedding_ids)
+        missing = [eid for eid in embedding_ids if eid not in rows]
+        if not missing:
+            return rows
 
-        # Get person data
         result = await session.execute(
-            select(Person).where(Person.id == face.person_id)
+            select(
+                Face.embedding_id,
+                Face.id.label("face_id"),
+                Face.quality_score,
+                Person.id.label("person_id"),
+                Person.name,
+                Person.person_metadata,
+            )
+            .join(Person, Person.id == Face.person_id)
+            .where(Face.embedding_id.in_(missing))
         )
-        person = result.scalar_one_or_none()
+        fetched = {row.embedding_id: row for row in result}
+        _match_cache.put_many(fetched)
+        rows.update(fetched)
+        return rows
 
-        if not person:
-            logger.warning(f"Person not found for person_id {face.person_id}")
-            return None
+    def _build_matches(
+        self,
+        hits: list[tuple[float, int]],
+        rows: dict[int, Any],
+        include_face_data: bool,
+    ) -> list[dict[str, Any]]:
+        """Assemble match dicts for hits, in hit order"""
+        matches = []
+        for similarity, embedding_id in hits:
+            row = rows.get(embedding_id)
+            if row is None:
+                logger.warning(f"Face not found for embedding_id {embedding_id}")
+                continue
+
+            match_data = {
+                "person_id": row.person_id,
+                "similarity": similarity,
+                "name": row.name,
+                "metadata": row.person_metadata,
+            }
 
-        # Always return safe metadata (dict or None)
-        metadata: Optional[dict[str, Any]] = None
-        if person.metadata:
-            try:
-                if isinstance(person.metadata, str):
-                    metadata = json.loads(person.metadata)
-                elif isinstance(person.metadata, dict):
-                    metadata = person.metadata
-                else:
-                    metadata = {}  # fallback if it's SQLAlchemy object
-            except Exception:
-                metadata = {}
-
-        match_data = {
-            "person_id": person.id,
-            "similarity": similarity,
-            "name": person.name,
-            "metadata": metadata,
-        }
+            if include_face_data:
+                match_data["face_id"] = str(row.face_id)
+                match_data["quality_score"] = row.quality_score
+
+            matches.append(match_data)
+            track_similarity_score(similarity)
 
-        if include_face_data:
-            match_data["face_id"] = str(face.id)
-            match_data["quality_score"] = face.quality_score
+        # Track identification result
+        if matches:
+            track_identification("matched")
+        else:
+            track_identification("unknown")
 
-        return match_data
+        return matches
 
     async def verify_face(
         self,
@@ -160,41 +319,40 @@ class IdentificationService:
         similarity_threshold: Optional[float] = None,
     ) -> dict[str, Any]:
         """Verify if face belongs to specific person (1:1 matching)"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         threshold = similarity_threshold or settings.similarity_threshold
 
-        # Get person's faces
+        # Get person's faces with their stored embeddings
         async with get_db_context() as session:
             result = await session.execute(
-                select(Face).where(Face.person_id == person_id)
+                select(Face.embedding_id, Face.embedding).where(Face.person_id == person_id)
             )
-            faces = result.scalars().all()
+            faces = result.all()
 
             if not faces:
                 return {
                     "verified": False,
                     "reason": "No enrolled faces for person",
-                    "processing_time_ms": (time.time() - start_time) * 1000,
+                    "processing_time_ms": (time.perf_counter() - start_time) * 1000,
                 }
 
-        # Process query image
-        pil_image = validate_image(image_bytes)
-        cv2_image = pil_to_cv2(pil_image)
-
-        face_data, embedding = self.face_engine.process_single_face(cv2_image)
-
-        # Get embeddings for person's faces
-        index = await get_index()
-        embedding_ids = [face.embedding_id for face in faces]
+        # Process query image off the event loop
+        _, _, embedding = await asyncio.to_thread(self._detect_face, image_bytes)
 
-        # Compare with each enrolled face
+        # Score every stored embedding with one matrix-vector product
         max_similarity = 0.0
-        for embedding_id in embedding_ids:
-            # This is simplified - in production, you'd retrieve stored embeddings
-            distances, ids = await index.search(embedding, k=len(embedding_ids))
-
-            for dist, idx in zip(distances, ids):
-                if idx == embedding_id:
+        blobs = [face.embedding for face in faces if face.embedding is not None]
+        if blobs:
+            stored = embeddings_from_blobs(blobs)
+            max_similarity = float((stored @ embedding.reshape(-1)).max())
+
+        # Faces enrolled before embeddings were persisted only live in the index
+        legacy_ids = {face.embedding_id for face in faces if face.embedding is None}
+        if legacy_ids:
+            index = await get_index()
+            distances, ids = await index.search(embedding, k=len(faces))
+            for dist, idx in zip(distances.tolist(), ids.tolist()):
+                if idx in legacy_ids:
                     max_similarity = max(max_similarity, dist)
 
         verified = max_similarity >= threshold
@@ -203,17 +361,11 @@ class IdentificationService:
             "verified": verified,
             "similarity": float(max_similarity),
             "threshold": threshold,
-            "processing_time_ms": (time.time() - start_time) * 1000,
+            "processing_time_ms": (time.perf_counter() - start_time) * 1000,
         }
 
 
-# Global instance
-_identification_service: Optional[IdentificationService] = None
-
-
+@lru_cache(maxsize=1)
 def get_identification_service() -> IdentificationService:
     """Get or create identification service instance"""
-    global _identification_service
-    if _identification_service is None:
-        _identification_service = IdentificationService()
-    return _identification_service
+    return IdentificationService()
@@ -1,4 +1,7 @@
-from typing import Any, Optional, Protocol
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Protocol
 
 import numpy as np
 
@@ -8,11 +11,19 @@ from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Shared read-only result for the disabled path, so it allocates nothing per call
+LIVENESS_DISABLED_RESULT: Mapping[str, Any] = MappingProxyType({
+    "is_live": True,
+    "confidence": 1.0,
+    "method": "none",
+    "details": MappingProxyType({"message": "Liveness check disabled"}),
+})
+
 
 class LivenessDetector(Protocol):
     """Protocol for liveness detection implementations"""
 
-    def check_liveness(self, image: np.ndarray, face_data: dict[str, Any]) -> dict[str, Any]:
+    def check_liveness(self, image: np.ndarray, face_data: dict[str, Any]) -> Mapping[str, Any]:
         """Check if face is live (not spoofed)"""
         ...
 
@@ -20,21 +31,16 @@ class LivenessDetector(Protocol):
 class NoOpLivenessDetector:
     """Placeholder liveness detector that always passes"""
 
-    def check_liveness(self, image: np.ndarray, face_data: dict[str, Any]) -> dict[str, Any]:
+    def check_liveness(self, image: np.ndarray, face_data: dict[str, Any]) -> Mapping[str, Any]:
         """Always return live (no-op implementation)"""
-        return {
-            "is_live": True,
-            "confidence": 1.0,
-            "method": "none",
-            "details": {"message": "Liveness check disabled"},
-        }
+        return LIVENESS_DISABLED_RESULT
 
 
 class SimpleLivenessDetector:
     """Simple liveness detector using basic heuristics"""
 
     def __init__(self, confidence_threshold: float = 0.7):
-        self.confidence_threshold = confidence_threshold
+        self.confidence_threshold = float(confidence_threshold)
 
     def check_liveness(self, image: np.ndarray, face_data: dict[str, Any]) -> dict[str, Any]:
         """Basic liveness check using texture analysis"""
@@ -81,10 +87,10 @@ class LivenessService:
 
         return SimpleLivenessDetector(settings.liveness_confidence_threshold)
 
-    def check_liveness(self, image: np.ndarray, face_data: dict[str, Any]) -> dict[str, Any]:
+    def check_liveness(self, image: np.ndarray, face_data: dict[str, Any]) -> Mapping[str, Any]:
         """Check liveness of detected face"""
         if not self.enabled:
-            return self.detector.check_liveness(image, face_data)
+            return LIVENESS_DISABLED_RESULT
 
         try:
             result = self.detector.check_liveness(image, face_data)
@@ -105,16 +111,10 @@ class LivenessService:
             raise
 
 
-# Global instance
-_liveness_service: Optional[LivenessService] = None
-
-
+@lru_cache(maxsize=1)
 def get_liveness_service() -> LivenessService:
     """Get or create liveness service instance"""
-    global _liveness_service
-    if _liveness_service is None:
-        _liveness_service = LivenessService()
-    return _liveness_service
+    return LivenessService()
 
 
 # Integration points for open-source solutions:
@@ -1,4 +1,4 @@
-import json
+from functools import lru_cache
 from typing import Any, Optional
 
 from sqlalchemy import func, select
@@ -8,6 +8,7 @@ from core.database import get_db_context
 from core.exceptions import PersonNotFoundException
 from core.models import Enrollment, Face, Person
 from core.schemas import PersonResponse
+from services.identification_service import invalidate_match_cache
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -31,16 +32,16 @@ class PersonService:
             new_person = Person(
                 id=person_id,
                 name=name,
-                metadata=json.dumps(metadata) if metadata else None,
+                person_metadata=metadata or None,
             )
             session.add(new_person)
             await session.commit()
             await session.refresh(new_person)
 
-            return PersonResponse(
+            return PersonResponse.model_construct(
                 id=new_person.id,
                 name=new_person.name,
-                metadata=json.loads(new_person.metadata) if new_person.metadata else None,
+                metadata=new_person.person_metadata,
                 face_count=0,
                 created_at=new_person.created_at,
                 updated_at=new_person.updated_at,
@@ -63,10 +64,10 @@ class PersonService:
             )
             face_count = face_count_result.scalar() or 0
 
-            return PersonResponse(
+            return PersonResponse.model_construct(
                 id=person.id,
                 name=person.name,
-                metadata=json.loads(person.metadata) if person.metadata else None,
+                metadata=person.person_metadata,
                 face_count=face_count,
                 created_at=person.created_at,
                 updated_at=person.updated_at,
@@ -88,41 +89,43 @@ class PersonService:
                     | Person.name.ilike(f"%{search}%")
                 )
 
-            # Get total count
-            count_result = await session.execute(
-                select(func.count()).select_from(query.subquery())
+            # Face counts and the unpaginated total ride along with the page
+            face_count = (
+                select(func.count(Face.id))
+                .where(Face.person_id == Person.id)
+                .correlate(Person)
+                .scalar_subquery()
             )
-            total = count_result.scalar() or 0
-
-            # Get paginated results
-            query = query.offset(offset).limit(limit).order_by(Person.created_at.desc())
-            result = await session.execute(query)
-            persons = result.scalars().all()
-
-            # Get face counts
-            person_ids = [p.id for p in persons]
-            face_counts = {}
-
-            if person_ids:
-                face_count_result = await session.execute(
-                    select(Face.person_id, func.count(Face.id))
-                    .where(Face.person_id.in_(person_ids))
-                    .group_by(Face.person_id)
+            page = (
+                query.add_columns(
+                    face_count.label("face_count"),
+                    func.count().over().label("total"),
                 )
-                face_counts = dict(face_count_result.all())
-
-            items = []
-            for person in persons:
-                items.append(
-                    PersonResponse(
-                        id=person.id,
-                        name=person.name,
-                        metadata=json.loads(person.metadata) if person.metadata else None,
-                        face_count=face_counts.get(person.id, 0),
-                        created_at=person.created_at,
-                        updated_at=person.updated_at,
-                    )
+                .order_by(Person.created_at.desc())
+                .offset(offset)
+                .limit(limit)
+            )
+            rows = (await session.execute(page)).all()
+
+            if rows:
+                total = rows[0].total
+            else:
+                # Past the last page there is no row to carry the total
+                total = await session.scalar(
+                    select(func.count()).select_from(query.subquery())
+                ) or 0
+
+            items = [
+                PersonResponse.model_construct(
+                    id=person.id,
+                    name=person.name,
+                    metadata=person.person_metadata,
+                    face_count=person_face_count,
+                    created_at=person.created_at,
+                    updated_at=person.updated_at,
                 )
+                for person, person_face_count, _ in rows
+            ]
 
             return {
                 "items": items,
@@ -145,6 +148,7 @@ class PersonService:
             # Faces will be cascade deleted
             await session.delete(person)
             await session.commit()
+            invalidate_match_cache()
 
             # TODO: Remove embeddings from index
             logger.warning(f"Person {person_id} deleted but embeddings remain in index")
@@ -175,13 +179,7 @@ class PersonService:
             }
 
 
-# Global instance
-_person_service: Optional[PersonService] = None
-
-
+@lru_cache(maxsize=1)
 def get_person_service() -> PersonService:
     """Get or create person service instance"""
-    global _person_service
-    if _person_service is None:
-        _person_service = PersonService()
-    return _person_service
+    return PersonService()
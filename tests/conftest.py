@@ -1,66 +1,163 @@
 import asyncio
-import uuid
+import itertools
 from typing import AsyncGenerator
 
-import numpy as np
 import pytest
-from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+try:
+    import uvloop
+except ImportError:  # uvicorn[standard] ships it, but not on every platform
+    uvloop = None
+
+from api.dependencies import get_enrollment_service_dep, get_identification_service_dep
 from api.main import app
 from core.database import get_db
 from core.models import Base
+from services.enrollment_service import EnrollmentService
+from services.identification_service import IdentificationService
+from tests.fixtures.mock_faces import (
+    MockFaceEngine,
+    MockLivenessService,
+    MockQualityAnalyzer,
+    EMBEDDING_POOL,
+    MockVectorIndex,
+    pool_embedding,
+)
 
 
 # Test database
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
+# Hands out successive pooled embeddings across the session
+_embedding_counter = itertools.count()
+
+# IDs only need to be unique within a run, so count instead of drawing uuids
+_person_counter = itertools.count()
+
 @pytest.fixture(scope="session")
 def event_loop():
-    """Create event loop for async tests"""
+    """Create one event loop (uvloop when available) for all async tests"""
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     loop = asyncio.get_event_loop_policy().new_event_loop()
     yield loop
     loop.close()
 
 
-@pytest.fixture(scope="function")
-async def test_db():
-    """Create test database"""
+@pytest.fixture(scope="session")
+async def test_engine():
+    """Create the test database once per session"""
     engine = create_async_engine(TEST_DATABASE_URL, echo=False)
     
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     
-    TestSessionLocal = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
-    
-    async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
-        async with TestSessionLocal() as session:
-            yield session
-    
-    app.dependency_overrides[get_db] = override_get_db
-    
-    yield
+    yield engine
     
     await engine.dispose()
 
 
+@pytest.fixture(scope="function")
+async def test_db(test_engine):
+    """Run each test inside a transaction that is rolled back afterwards"""
+    async with test_engine.connect() as conn:
+        transaction = await conn.begin()
+        
+        # Commits inside the app release a savepoint instead of the outer transaction
+        TestSessionLocal = async_sessionmaker(
+            bind=conn,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+        
+        async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+            async with TestSessionLocal() as session:
+                yield session
+        
+        app.dependency_overrides[get_db] = override_get_db
+        
+        yield
+        
+        app.dependency_overrides.pop(get_db, None)
+        await transaction.rollback()
+
+
+@pytest.fixture(scope="session")
+async def shared_client():
+    """One HTTP client for the whole session"""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
 @pytest.fixture
-async def client(test_db):
+async def client(test_db, shared_client):
     """Create test client"""
-    async with AsyncClient(app=app, base_url="http://test") as ac:
-        yield ac
+    return shared_client
+
+
+@pytest.fixture(scope="session")
+def mock_engine():
+    """Mock face engine shared by the whole session"""
+    return MockFaceEngine()
+
+
+@pytest.fixture(scope="session")
+def mock_quality():
+    """Mock quality analyzer shared by the whole session"""
+    return MockQualityAnalyzer()
+
+
+@pytest.fixture(scope="session")
+def mock_liveness():
+    """Mock liveness service shared by the whole session"""
+    return MockLivenessService()
+
+
+@pytest.fixture(scope="session")
+def mock_index():
+    """Mock vector index shared by the whole session"""
+    return MockVectorIndex()
+
+
+@pytest.fixture
+async def mock_services(monkeypatch, mock_engine, mock_quality, mock_liveness, mock_index):
+    """Route enrollment and identification to the shared mocks, reset per test"""
+    mock_engine.reset()
+    await mock_index.clear()
+
+    async def get_mock_index():
+        return mock_index
+
+    for module in ("services.enrollment_service", "services.identification_service"):
+        monkeypatch.setattr(f"{module}.get_face_engine", lambda: mock_engine)
+        monkeypatch.setattr(f"{module}.get_quality_analyzer", lambda: mock_quality)
+        monkeypatch.setattr(f"{module}.get_liveness_service", lambda: mock_liveness)
+        monkeypatch.setattr(f"{module}.get_index", get_mock_index)
+
+    # Services capture their collaborators when built, so build them after patching
+    enrollment_service = EnrollmentService()
+    identification_service = IdentificationService()
+    app.dependency_overrides[get_enrollment_service_dep] = lambda: enrollment_service
+    app.dependency_overrides[get_identification_service_dep] = lambda: identification_service
+
+    yield
+
+    app.dependency_overrides.pop(get_enrollment_service_dep, None)
+    app.dependency_overrides.pop(get_identification_service_dep, None)
+
+
+@pytest.fixture(scope="session")
+def normalized_embeddings():
+    """Read-only batch of unit embeddings; slice it instead of generating vectors"""
+    return EMBEDDING_POOL
 
 
 @pytest.fixture
 def mock_embedding():
     """Generate mock face embedding"""
-    embedding = np.random.randn(512).astype(np.float32)
-    # L2 normalize
-    embedding = embedding / np.linalg.norm(embedding)
-    return embedding
+    return pool_embedding(next(_embedding_counter))
 
 
 @pytest.fixture
@@ -71,14 +168,14 @@ def mock_face_data():
         "landmarks": [[120.0, 130.0], [180.0, 130.0], [150.0, 160.0], 
                       [130.0, 190.0], [170.0, 190.0]],
         "det_score": 0.99,
-        "embedding": np.random.randn(512).astype(np.float32),
+        "embedding": pool_embedding(next(_embedding_counter)),
     }
 
 
 @pytest.fixture
 def sample_person_id():
     """Generate sample person ID"""
-    return f"person_{uuid.uuid4().hex[:8]}"
+    return f"person_{next(_person_counter):08x}"
 
 
 @pytest.fixture
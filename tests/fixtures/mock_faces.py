@@ -1,12 +1,39 @@
+import itertools
 from typing import Any, Tuple
 
+import faiss
 import numpy as np
 
 
+# Unit embeddings generated once per session; mocks hand out rows instead of
+# drawing and normalizing a fresh vector on every call
+def l2norm_inplace(x: np.ndarray) -> np.ndarray:
+    """L2-normalize every row of a float32 array in place (1-D arrays too)"""
+    faiss.normalize_L2(x.reshape(-1, x.shape[-1]))
+    return x
+
+
+EMBEDDING_POOL = l2norm_inplace(
+    np.random.default_rng(0).standard_normal((1024, 512), dtype=np.float32)
+)
+EMBEDDING_POOL.setflags(write=False)
+
+
+def pool_embedding(n: int) -> np.ndarray:
+    """Get the n-th pooled embedding (read-only view)"""
+    return EMBEDDING_POOL[n % len(EMBEDDING_POOL)]
+
+
 class MockFaceEngine:
     """Mock face engine for testing"""
     
     def __init__(self):
+        self.reset()
+        # Each detected face gets the next pooled embedding, so faces stay distinct
+        self._embedding_counter = itertools.count()
+    
+    def reset(self) -> None:
+        """Restore default detection behaviour"""
         self.should_detect_face = True
         self.should_detect_multiple = False
         self.face_quality = 0.8
@@ -25,13 +52,14 @@ class MockFaceEngine:
     
     def _create_mock_face(self, index: int) -> dict[str, Any]:
         """Create mock face data"""
-        embedding = np.random.randn(512).astype(np.float32)
-        embedding = embedding / np.linalg.norm(embedding)
+        embedding = pool_embedding(next(self._embedding_counter))
         
         return {
-            "bbox": [100.0 + index * 50, 100.0, 200.0 + index * 50, 200.0],
-            "landmarks": [[120.0, 130.0], [180.0, 130.0], [150.0, 160.0], 
-                         [130.0, 190.0], [170.0, 190.0]],
+            "bbox": np.array(
+                [100.0 + index * 50, 100.0, 200.0 + index * 50, 200.0], dtype=np.float32
+            ),
+            "landmarks": np.array([[120.0, 130.0], [180.0, 130.0], [150.0, 160.0], 
+                                   [130.0, 190.0], [170.0, 190.0]], dtype=np.float32),
             "det_score": 0.99 - index * 0.1,
             "embedding": embedding,
             "face": None,
@@ -101,44 +129,46 @@ class MockLivenessService:
 class MockVectorIndex:
     """Mock vector index for testing"""
     
-    def __init__(self):
-        self.embeddings = {}
+    def __init__(self, quantized: bool = False):
         self._next_id = 0
         self.dimension = 512
+        if quantized:
+            # int8 codes like index_precision=int8, range fixed to [-1, 1] for unit vectors
+            base = faiss.IndexScalarQuantizer(
+                self.dimension, faiss.ScalarQuantizer.QT_8bit_uniform, faiss.METRIC_INNER_PRODUCT
+            )
+            faiss.copy_array_to_vector(np.array([-1.0, 2.0], dtype=np.float32), base.sq.trained)
+            base.is_trained = True
+        else:
+            # Exact inner-product search over normalized vectors
+            base = faiss.IndexFlatIP(self.dimension)
+        self._index = faiss.IndexIDMap(base)
     
     async def add(self, embeddings: np.ndarray, ids: list[int]) -> None:
         """Add embeddings to mock index"""
-        for emb, idx in zip(embeddings, ids):
-            self.embeddings[idx] = emb
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.array(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        faiss.normalize_L2(vectors)
+        # Re-adding an ID replaces its previous embedding
+        self._index.remove_ids(ids)
+        self._index.add_with_ids(vectors, ids)
     
     async def search(
         self, query_embedding: np.ndarray, k: int = 5
     ) -> Tuple[np.ndarray, np.ndarray]:
         """Search in mock index"""
-        if not self.embeddings:
+        k = min(k, self._index.ntotal)
+        if k <= 0:
             return np.array([]), np.array([])
         
-        # Compute similarities
-        similarities = []
-        indices = []
-        
-        for idx, emb in self.embeddings.items():
-            sim = float(np.dot(query_embedding.flatten(), emb.flatten()))
-            similarities.append(sim)
-            indices.append(idx)
-        
-        # Sort by similarity
-        sorted_indices = np.argsort(similarities)[::-1][:k]
-        
-        return (
-            np.array([similarities[i] for i in sorted_indices]),
-            np.array([indices[i] for i in sorted_indices]),
-        )
+        query = np.array(query_embedding, dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(query)
+        distances, indices = self._index.search(query, k)
+        return distances[0], indices[0]
     
     async def remove(self, ids: list[int]) -> None:
         """Remove from mock index"""
-        for idx in ids:
-            self.embeddings.pop(idx, None)
+        self._index.remove_ids(np.asarray(ids, dtype=np.int64))
     
     async def save(self, path: str) -> None:
         """Mock save"""
@@ -150,7 +180,7 @@ class MockVectorIndex:
     
     async def clear(self) -> None:
         """Clear mock index"""
-        self.embeddings.clear()
+        self._index.reset()
     
     async def rebuild(self) -> None:
         """Mock rebuild"""
@@ -158,7 +188,7 @@ class MockVectorIndex:
     
     def size(self) -> int:
         """Get mock index size"""
-        return len(self.embeddings)
+        return self._index.ntotal
     
     def dimension(self) -> int:
         """Get embedding dimension"""
@@ -71,16 +71,12 @@ def test_mock_quality_analyzer():
     assert result["is_acceptable"] == (result["overall_score"] >= analyzer.quality_threshold)
 
 
-def test_similarity_computation():
+def test_similarity_computation(normalized_embeddings):
     """Test similarity computation"""
     engine = MockFaceEngine()
     
     # Create two random embeddings
-    emb1 = np.random.randn(512).astype(np.float32)
-    emb1 = emb1 / np.linalg.norm(emb1)
-    
-    emb2 = np.random.randn(512).astype(np.float32)
-    emb2 = emb2 / np.linalg.norm(emb2)
+    emb1, emb2 = normalized_embeddings[:2]
     
     # Test similarity
     similarity = engine.compute_similarity(emb1, emb2)
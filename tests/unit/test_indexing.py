@@ -5,19 +5,18 @@ from tests.fixtures.mock_faces import MockVectorIndex
 
 
 @pytest.mark.asyncio
-async def test_mock_index_add_search():
+@pytest.mark.parametrize("n", [3, 100, pytest.param(1000, marks=pytest.mark.slow)])
+async def test_mock_index_add_search(n, normalized_embeddings):
     """Test mock index add and search operations"""
     index = MockVectorIndex()
     
     # Add embeddings
-    embeddings = np.random.randn(3, 512).astype(np.float32)
-    for i in range(3):
-        embeddings[i] = embeddings[i] / np.linalg.norm(embeddings[i])
+    embeddings = normalized_embeddings[:n]
     
-    ids = [0, 1, 2]
+    ids = list(range(n))
     await index.add(embeddings, ids)
     
-    assert index.size() == 3
+    assert index.size() == n
     
     # Search
     query = embeddings[0]
@@ -30,12 +29,28 @@ async def test_mock_index_add_search():
 
 
 @pytest.mark.asyncio
-async def test_mock_index_remove():
+async def test_mock_index_quantized_search(normalized_embeddings):
+    """Test int8 mock index ranks within quantization error"""
+    index = MockVectorIndex(quantized=True)
+    
+    embeddings = normalized_embeddings[:100]
+    await index.add(embeddings, list(range(100)))
+    await index.remove([1])
+    
+    distances, indices = await index.search(embeddings[0], k=2)
+    
+    assert indices[0] == 0
+    assert distances[0] > 0.99
+    assert index.size() == 99
+
+
+@pytest.mark.asyncio
+async def test_mock_index_remove(normalized_embeddings):
     """Test mock index remove operation"""
     index = MockVectorIndex()
     
     # Add embeddings
-    embeddings = np.random.randn(3, 512).astype(np.float32)
+    embeddings = normalized_embeddings[:3]
     ids = [0, 1, 2]
     await index.add(embeddings, ids)
     
@@ -51,12 +66,12 @@ async def test_mock_index_remove():
 
 
 @pytest.mark.asyncio
-async def test_mock_index_clear():
+async def test_mock_index_clear(normalized_embeddings):
     """Test mock index clear operation"""
     index = MockVectorIndex()
     
     # Add embeddings
-    embeddings = np.random.randn(3, 512).astype(np.float32)
+    embeddings = normalized_embeddings[:3]
     ids = [0, 1, 2]
     await index.add(embeddings, ids)
     
@@ -73,12 +88,34 @@ async def test_mock_index_clear():
 
 
 @pytest.mark.asyncio
-async def test_mock_index_empty_search():
+async def test_mock_index_empty_search(normalized_embeddings):
     """Test searching in empty index"""
     index = MockVectorIndex()
     
-    query = np.random.randn(512).astype(np.float32)
+    query = normalized_embeddings[0]
     distances, indices = await index.search(query, k=5)
     
     assert len(distances) == 0
-    assert len(indices) == 0
\ No newline at end of file
+    assert len(indices) == 0
+
+
+@pytest.mark.asyncio
+async def test_faiss_flat_id_mapping_roundtrip(tmp_path, normalized_embeddings):
+    """Test FAISS flat index ID mapping survives remove, save and load"""
+    from indexing.base import IndexConfig
+    from indexing.faiss_index import FaissIndexFlat
+
+    index = FaissIndexFlat(IndexConfig(dimension=512))
+    embeddings = normalized_embeddings[:3]
+    await index.add(embeddings, [10, 11, 12])
+    await index.remove([11])
+
+    path = str(tmp_path / "index" / "faces")
+    await index.save(path)
+
+    loaded = FaissIndexFlat(IndexConfig(dimension=512))
+    await loaded.load(path)
+
+    distances, indices = await loaded.search(embeddings[1], k=3)
+    assert 11 not in indices
+    assert set(indices) == {10, 12}
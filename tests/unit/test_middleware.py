@@ -0,0 +1,32 @@
+from api import middleware
+from api.config import settings
+
+
+def test_rate_limit_fixed_window(monkeypatch):
+    """Test fixed-window counting and rollover"""
+    middleware.rate_limit_storage.clear()
+    window = settings.rate_limit_window
+
+    monkeypatch.setattr(middleware.time, "monotonic", lambda: 10.0 * window)
+    assert middleware._hit_local("10.0.0.1") == 1
+    assert middleware._hit_local("10.0.0.1") == 2
+    assert middleware._hit_local("10.0.0.2") == 1
+
+    # Next window resets the count
+    monkeypatch.setattr(middleware.time, "monotonic", lambda: 11.0 * window)
+    assert middleware._hit_local("10.0.0.1") == 1
+    assert middleware.rate_limit_storage["10.0.0.1"] == (11, 1)
+
+
+def test_rate_limit_storage_is_bounded(monkeypatch):
+    """Test new clients evict old ones once the storage is full"""
+    middleware.rate_limit_storage.clear()
+    monkeypatch.setattr(settings, "rate_limit_max_clients", 3)
+    monkeypatch.setattr(middleware.time, "monotonic", lambda: 0.0)
+
+    for i in range(5):
+        middleware._hit_local(f"10.0.0.{i}")
+
+    assert len(middleware.rate_limit_storage) == 3
+    assert "10.0.0.4" in middleware.rate_limit_storage
+    assert "10.0.0.0" not in middleware.rate_limit_storage
@@ -1,6 +1,7 @@
 import os
 import uuid
 import io
+from functools import lru_cache
 from typing import Optional
 
 import cv2
@@ -15,27 +16,46 @@ def pil_to_cv2(pil_image: Image.Image) -> np.ndarray:
     cv2_image = np.array(pil_image)
     if cv2_image.ndim == 2:  # grayscale
         return cv2_image
-    return cv2.cvtColor(cv2_image, cv2.COLOR_RGB2BGR)
+    # Swap channels in place: the array is already our own copy, and OpenCV
+    # consumers need it contiguous, which a [..., ::-1] view would not be
+    return cv2.cvtColor(cv2_image, cv2.COLOR_RGB2BGR, dst=cv2_image)
+
+
+# Quality 90 without Huffman-table optimization: the extra pass costs more
+# encode time than the few percent of size it saves
+JPEG_WRITE_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, 90, cv2.IMWRITE_JPEG_OPTIMIZE, 0]
+
+
+@lru_cache(maxsize=128)
+def _ensure_dir(path: str) -> None:
+    """Create a directory once per process instead of on every save"""
+    os.makedirs(path, exist_ok=True)
 
 
 def save_image_to_disk(
-    pil_image: Image.Image,
+    cv2_image: np.ndarray,
     output_dir: str,
     filename: Optional[str] = None,
     ext: str = "jpg",
 ) -> str:
     """
-    Save a PIL Image to disk and return the file path.
+    Save an OpenCV (BGR) image to disk and return the file path.
     - Creates the output directory if it doesn't exist.
     - Generates a random filename if not provided.
     """
-    os.makedirs(output_dir, exist_ok=True)
+    _ensure_dir(output_dir)
 
     if filename is None:
-        filename = str(uuid.uuid4())
+        filename = uuid.uuid4().hex
 
     file_path = os.path.join(output_dir, f"{filename}.{ext}")
-    pil_image.save(file_path)
+    params = JPEG_WRITE_PARAMS if ext.lower() in ("jpg", "jpeg") else []
+    if not cv2.imwrite(file_path, cv2_image, params):
+        # The directory may have been removed since it was cached
+        _ensure_dir.cache_clear()
+        _ensure_dir(output_dir)
+        if not cv2.imwrite(file_path, cv2_image, params):
+            raise ValueError(f"Cannot write image as .{ext}: {file_path}")
     return file_path
 
 
@@ -53,8 +73,52 @@ def validate_image(image_bytes: bytes, min_size: int = 50) -> Image.Image:
     if width < min_size or height < min_size:
         raise ValueError(f"Image too small: {width}x{height}, min={min_size}")
 
-    cv_img = pil_to_cv2(pil_image)
-    if len(cv_img.shape) != 3 or cv_img.shape[2] != 3:
-        raise ValueError("Invalid image: must have 3 channels (RGB)")
-
+    # convert("RGB") above guarantees 3 channels
     return pil_image
+
+
+# Scaled-decode flags by reduction factor; libjpeg downsamples in the DCT
+# domain, so a reduced JPEG decode touches a fraction of the pixels
+_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def _decode_flags(image_bytes: bytes, max_side: int) -> int:
+    """Pick the largest decode reduction that keeps the long side >= max_side"""
+    try:
+        # Image.open only parses the header; pixels are never loaded
+        with Image.open(io.BytesIO(image_bytes)) as header:
+            long_side = max(header.size)
+    except Exception:
+        return cv2.IMREAD_COLOR
+    for factor, flag in _REDUCED_DECODE_FLAGS:
+        if long_side // factor >= max_side:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def decode_image(image_bytes: bytes, min_size: int = 50, max_side: int = 0) -> np.ndarray:
+    """
+    Decode and validate raw bytes straight to an OpenCV BGR image.
+    - Skips the PIL decode and RGB->BGR conversion of validate_image + pil_to_cv2.
+    - With max_side > 0, large images are decoded at 1/2, 1/4 or 1/8 scale while
+      the long side stays at least max_side.
+    - Falls back to PIL for formats OpenCV cannot read; raises ValueError if invalid.
+    """
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    cv2_image = None
+    if buffer.size:
+        flags = _decode_flags(image_bytes, max_side) if max_side > 0 else cv2.IMREAD_COLOR
+        # PIL never applied EXIF orientation, so don't let OpenCV either
+        cv2_image = cv2.imdecode(buffer, flags | cv2.IMREAD_IGNORE_ORIENTATION)
+    if cv2_image is None:
+        return pil_to_cv2(validate_image(image_bytes, min_size))
+
+    height, width = cv2_image.shape[:2]
+    if width < min_size or height < min_size:
+        raise ValueError(f"Image too small: {width}x{height}, min={min_size}")
+
+    return cv2_image
@@ -1,12 +1,32 @@
+import atexit
 import logging
+import queue
 import sys
-from typing import Any
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
 
+import orjson
 import structlog
 from structlog.types import EventDict, Processor
 
 from api.config import settings
 
+_listener: Optional[QueueListener] = None
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueue records as-is so JSON rendering and stdout writes run on the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _orjson_dumps(obj: Any, default: Any = None, **kwargs: Any) -> str:
+    """JSON serializer for JSONRenderer; handlers expect text, orjson returns bytes"""
+    return orjson.dumps(
+        obj, default=default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    ).decode()
+
 
 def add_app_context(logger: logging.Logger, method_name: str, event_dict: EventDict) -> EventDict:
     """Add application context to all log entries"""
@@ -23,23 +43,29 @@ def setup_logging() -> None:
     shared_processors: list[Processor] = [
         structlog.stdlib.add_log_level,
         structlog.stdlib.add_logger_name,
-        structlog.processors.add_log_level,
         timestamper,
         structlog.processors.StackInfoRenderer(),
         structlog.processors.format_exc_info,
         structlog.processors.UnicodeDecoder(),
         add_app_context,
-        structlog.processors.CallsiteParameterAdder(
-            parameters=[
-                structlog.processors.CallsiteParameter.FILENAME,
-                structlog.processors.CallsiteParameter.FUNC_NAME,
-                structlog.processors.CallsiteParameter.LINENO,
-            ]
-        ),
     ]
+    if settings.log_level == "DEBUG":
+        # Walks the caller's stack frames on every call, so only when debugging
+        shared_processors.append(
+            structlog.processors.CallsiteParameterAdder(
+                parameters=[
+                    structlog.processors.CallsiteParameter.FILENAME,
+                    structlog.processors.CallsiteParameter.FUNC_NAME,
+                    structlog.processors.CallsiteParameter.LINENO,
+                ]
+            )
+        )
 
     structlog.configure(
-        processors=shared_processors
+        # Drop records below the logger's level before any processor runs, so
+        # disabled hot-path calls skip the rest of the chain
+        processors=[structlog.stdlib.filter_by_level]
+        + shared_processors
         + [
             structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ],
@@ -51,18 +77,27 @@ def setup_logging() -> None:
         foreign_pre_chain=shared_processors,
         processors=[
             structlog.stdlib.ProcessorFormatter.remove_processors_meta,
-            structlog.processors.JSONRenderer(),
+            structlog.processors.JSONRenderer(serializer=_orjson_dumps),
         ],
     )
 
     handler = logging.StreamHandler(sys.stdout)
     handler.setFormatter(formatter)
 
+    # Callers only pay for an enqueue; a background thread formats and writes
+    global _listener
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
     root_logger = logging.getLogger()
-    root_logger.addHandler(handler)
+    root_logger.addHandler(_DeferredQueueHandler(log_queue))
     root_logger.setLevel(getattr(logging, settings.log_level))
 
-    # Silence noisy libraries
+    # Silence noisy libraries. Production launches also pass --no-access-log so
+    # uvicorn doesn't format the access line args only for them to be dropped;
+    # ObservabilityMiddleware already logs every request
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
 
@@ -1,3 +1,4 @@
+import os
 from typing import Optional
 from prometheus_client import (
     Counter,
@@ -10,6 +11,23 @@ from prometheus_client import (
 # ✅ Custom registry عشان نتفادى duplication
 registry = CollectorRegistry()
 
+# With multiple workers each process writes its samples to PROMETHEUS_MULTIPROC_DIR;
+# scrapes aggregate those files instead of reporting whichever worker answered.
+# The variable must be set (and the directory emptied) before the workers start.
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    from prometheus_client import multiprocess
+
+    _scrape_registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(_scrape_registry)
+else:
+    _scrape_registry = registry
+
+# Buckets sized to each operation's latency range instead of the 15 defaults
+REQUEST_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+INFERENCE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+INDEX_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+DB_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
 # Request metrics
 REQUEST_COUNT = Counter(
     "face_recognition_requests_total",
@@ -22,6 +40,7 @@ REQUEST_DURATION = Histogram(
     "face_recognition_request_duration_seconds",
     "Request duration in seconds",
     ["method", "endpoint"],
+    buckets=REQUEST_BUCKETS,
     registry=registry,
 )
 
@@ -36,12 +55,14 @@ FACE_DETECTION_COUNT = Counter(
 FACE_DETECTION_DURATION = Histogram(
     "face_detection_duration_seconds",
     "Face detection duration in seconds",
+    buckets=INFERENCE_BUCKETS,
     registry=registry,
 )
 
 FACE_EMBEDDING_DURATION = Histogram(
     "face_embedding_duration_seconds",
     "Face embedding extraction duration in seconds",
+    buckets=INFERENCE_BUCKETS,
     registry=registry,
 )
 
@@ -56,18 +77,21 @@ FACE_QUALITY_SCORE = Histogram(
 INDEX_SIZE = Gauge(
     "face_index_size",
     "Number of faces in the index",
+    multiprocess_mode="livemax",
     registry=registry,
 )
 
 INDEX_SEARCH_DURATION = Histogram(
     "face_index_search_duration_seconds",
     "Index search duration in seconds",
+    buckets=INDEX_BUCKETS,
     registry=registry,
 )
 
 INDEX_ADD_DURATION = Histogram(
     "face_index_add_duration_seconds",
     "Index add operation duration in seconds",
+    buckets=INDEX_BUCKETS,
     registry=registry,
 )
 
@@ -76,12 +100,14 @@ DB_QUERY_DURATION = Histogram(
     "database_query_duration_seconds",
     "Database query duration in seconds",
     ["operation", "table"],
+    buckets=DB_BUCKETS,
     registry=registry,
 )
 
 DB_CONNECTION_POOL_SIZE = Gauge(
     "database_connection_pool_size",
     "Current size of the database connection pool",
+    multiprocess_mode="livesum",
     registry=registry,
 )
 
@@ -108,9 +134,19 @@ SIMILARITY_SCORES = Histogram(
 )
 
 
+# Children bound at import for the label values the services emit; anything
+# else is bound on first use
+_ENROLLMENT_CHILDREN = {
+    status: ENROLLMENT_COUNT.labels(status=status) for status in ("completed", "failed")
+}
+_IDENTIFICATION_CHILDREN = {
+    result: IDENTIFICATION_COUNT.labels(result=result) for result in ("matched", "unknown", "error")
+}
+
+
 def get_metrics() -> bytes:
     """Generate Prometheus metrics"""
-    return generate_latest(registry)
+    return generate_latest(_scrape_registry)
 
 
 def track_face_quality(score: float) -> None:
@@ -125,9 +161,17 @@ def track_similarity_score(score: float) -> None:
 
 def track_enrollment(status: str) -> None:
     """Track enrollment"""
-    ENROLLMENT_COUNT.labels(status=status).inc()
+    child = _ENROLLMENT_CHILDREN.get(status)
+    if child is None:
+        child = _ENROLLMENT_CHILDREN.setdefault(status, ENROLLMENT_COUNT.labels(status=status))
+    child.inc()
 
 
 def track_identification(result: str) -> None:
     """Track identification"""
-    IDENTIFICATION_COUNT.labels(result=result).inc()
+    child = _IDENTIFICATION_CHILDREN.get(result)
+    if child is None:
+        child = _IDENTIFICATION_CHILDREN.setdefault(
+            result, IDENTIFICATION_COUNT.labels(result=result)
+        )
+    child.inc()
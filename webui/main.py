@@ -1,15 +1,31 @@
 # path: webui/main.py
-import base64
+from contextlib import asynccontextmanager
+
 import httpx
-from fastapi import FastAPI, Request, UploadFile, File
+import orjson
+from fastapi import FastAPI, File, Request, UploadFile
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 
-app = FastAPI(title="Face Recognition WebUI")
-templates = Jinja2Templates(directory="webui/templates")
-
 API_URL = "http://localhost:8000/api/v1/identify"  # رابط API الأساسي
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one pooled client so requests reuse kept-alive API connections"""
+    app.state.http = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=httpx.Timeout(10.0),
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+
+
+app = FastAPI(title="Face Recognition WebUI", lifespan=lifespan)
+templates = Jinja2Templates(directory="webui/templates")
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     return templates.TemplateResponse(
@@ -22,12 +38,11 @@ async def identify(request: Request, image: UploadFile = File(...)):
         image_bytes = await image.read()
 
         # call API
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                API_URL,
-                files={"image": (image.filename, image_bytes, image.content_type)},
-            )
-        result = response.json()
+        response = await request.app.state.http.post(
+            API_URL,
+            files={"image": (image.filename, image_bytes, image.content_type)},
+        )
+        result = orjson.loads(response.content)
 
         if "matches" in result and result["matches"]:
             match = result["matches"][0]
@@ -40,17 +55,11 @@ async def identify(request: Request, image: UploadFile = File(...)):
         else:
             display_result = "Unknown"
 
-        # نحول الصورة لـ base64 عشان نعرضها في الـ HTML
-        image_data = base64.b64encode(image_bytes).decode("utf-8")
-        mime_type = image.content_type
-
+        # index.html never renders image_data (the browser previews the file
+        # itself), so don't base64-encode the upload just to discard it
         return templates.TemplateResponse(
             "index.html",
-            {
-                "request": request,
-                "result": display_result,
-                "image_data": f"data:{mime_type};base64,{image_data}",
-            },
+            {"request": request, "result": display_result, "image_data": None},
         )
     except Exception as e:
         return templates.TemplateResponse(